@@ -3,5 +3,139 @@ import os
 UPLOAD_DIR = "uploads"
 DB_PATH = "database.db"
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+# Uploads are streamed in UPLOAD_CHUNK_SIZE pieces and rejected with 413
+# once they exceed MAX_UPLOAD_BYTES
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# SQLite connection settings, applied to every pooled connection.
+# WAL lets readers run alongside a writer; synchronous=NORMAL is durable
+# in WAL mode except for the last commits on power loss. SQLITE_CACHE_SIZE
+# follows PRAGMA cache_size: negative values are KiB, positive are pages.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Threads that run queries for the async route handlers (each with its own
+# pooled connection); a slow scan occupies one while the others keep serving
+DB_THREADS = int(os.getenv("DB_THREADS", "4"))
+
+# Image pipeline. Images are decoded for embedding at about
+# MODEL_IMAGE_SIZE (the CLIP input size) using JPEG draft mode or PIL
+# reduce. Each upload also gets JPEG renditions that fit THUMBNAIL_SIZE
+# (list cards) and MEDIUM_SIZE (detail views) under uploads/thumbs and
+# uploads/medium. reembed.py caches model-sized crops in
+# PREPROCESS_CACHE_DIR.
+MODEL_IMAGE_SIZE = 224
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "400"))
+MEDIUM_SIZE = int(os.getenv("MEDIUM_SIZE", "1280"))
+RENDITION_QUALITY = int(os.getenv("RENDITION_QUALITY", "85"))
+PREPROCESS_CACHE_DIR = os.getenv("PREPROCESS_CACHE_DIR", os.path.join("cache", "preprocessed"))
+
+# Uploads are stored under their SHA-256, so identical photos share one
+# file and one cached image embedding. Photos whose 64-bit difference hash
+# differs in at most PHASH_MAX_DISTANCE bits (0 disables) count as near
+# duplicates: they reuse that embedding and appear in the duplicate report.
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "3"))
+
+# On-disk embedding format: "float32" or "float16" little-endian BLOBs
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+# CLIP model, loaded lazily and warmed up at startup. MODEL_NAME is the
+# initial active model of a new database; later switches are recorded in the
+# settings table (reembed.py --model + POST /embedding-models/activate).
+# Using larger, more accurate CLIP model for better image matching across different angles.
+# TORCH_NUM_THREADS caps intra-op threads per worker (0 = torch default) so
+# several uvicorn workers do not oversubscribe the cores.
+MODEL_NAME = os.getenv("MODEL_NAME", "clip-ViT-L-14")
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") == "1"
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+
+# Inference backend: "torch" (sentence-transformers) or "onnx" (CLIP towers
+# exported with export_onnx.py into ONNX_MODEL_DIR and run by the optional
+# onnxruntime package on CPU; TORCH_NUM_THREADS caps its threads too).
+# ONNX_QUANTIZED picks the dynamic int8 export over fp32.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("models", "onnx"))
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"
+
+# CLIP inference runs off the event loop on a "thread" or "process" pool.
+# INFERENCE_CONCURRENCY bounds how many encodes are in flight at once.
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", str(INFERENCE_WORKERS)))
+
+# Micro-batching of concurrent encode requests: flush a batch at
+# EMBED_BATCH_SIZE items or EMBED_BATCH_WAIT_MS after its first item
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+# Query-embedding cache: texts keyed on normalized query, images on a hash
+# of their bytes. Bounded by entries and bytes; TTL in seconds (0 = none).
+EMBED_CACHE_ENTRIES = int(os.getenv("EMBED_CACHE_ENTRIES", "2048"))
+EMBED_CACHE_BYTES = int(os.getenv("EMBED_CACHE_BYTES", str(64 * 1024 * 1024)))
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "3600"))
+
+# Asynchronous ingestion: /add-item stores the row as 'pending' and a
+# background worker fills in the embedding from the SQLite job queue
+ASYNC_INGEST = os.getenv("ASYNC_INGEST", "0") == "1"
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "2"))
+
+# Bulk import: items encoded per model call and inserted per transaction
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "64"))
+
+# Item listings (/items, student feed, admin dashboard) are paged newest
+# first with an `after_id` cursor; `limit` is capped at MAX_PAGE_SIZE
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "24"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+# Per-stage latency histograms and counters for the hot paths, exposed as
+# Prometheus text at /metrics. METRICS_ENABLED=0 turns every timer into a
+# no-op.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Server-Timing response header listing the request's stage durations
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# Opt-in request profiling with the optional pyinstrument package. While
+# enabled (here or from the admin API), PROFILE_SAMPLE_RATE of requests
+# and any request carrying the PROFILE_HEADER header are profiled; HTML
+# reports go to PROFILE_DIR, keeping the newest PROFILE_KEEP.
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+
+# Search tuning
+SEARCH_TOP_K = 10
+SIMILARITY_THRESHOLD = 0.45
+# Candidate matches stored per item when it is added or updated: the best
+# MATCH_TOP_K open items on the other side (lost vs. found) scoring above
+# SIMILARITY_THRESHOLD
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "5"))
+# Default /search mode: "vector" (CLIP similarity), "keyword" (FTS5 BM25,
+# no model call) or "hybrid" (both rankings merged by reciprocal rank
+# fusion). HYBRID_CANDIDATES hits per ranking are fused; RRF_K damps the
+# weight of top ranks.
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Vector index: "exact" (brute force), "ivf" (NumPy inverted file) or
+# "hnsw" (requires the optional hnswlib package). Tables smaller than
+# ANN_MIN_ITEMS always use exact search.
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "exact")
+ANN_MIN_ITEMS = int(os.getenv("ANN_MIN_ITEMS", "5000"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = sqrt(number of items)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF = int(os.getenv("HNSW_EF", "64"))
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
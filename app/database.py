@@ -1,17 +1,155 @@
+import asyncio
 import sqlite3
-from .config import DB_PATH
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from .config import (
+    DB_PATH,
+    DB_THREADS,
+    MODEL_NAME,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+)
+from .utils.metrics import metrics
 
 
-def get_connection():
-    """Return a SQLite connection with basic settings."""
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+def connect(path=DB_PATH):
+    """Open a new SQLite connection with the configured pragmas.
+
+    Used directly by scripts and long-running jobs; the app borrows pooled
+    connections through `connection()` / `run_db()` instead.
+    """
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size = {int(SQLITE_CACHE_SIZE)}")
+    conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
     return conn
 
 
+class ConnectionPool:
+    """One long-lived connection per thread, opened on first use.
+
+    Reusing a connection keeps its page cache and prepared statements warm
+    and skips the open/pragma cost on every request. Borrowing is
+    re-entrant: only the outermost borrow on a thread cleans up, rolling
+    back anything left uncommitted so the next borrower starts clean.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def acquire(self):
+        local = self._local
+        if getattr(local, "conn", None) is None:
+            local.conn = connect(self.path)
+            local.depth = 0
+            with self._lock:
+                self._connections.append(local.conn)
+        local.depth += 1
+        return local.conn
+
+    def release(self, conn):
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+    def close_all(self):
+        """Close every pooled connection (at shutdown)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+_pool = ConnectionPool()
+
+
+@contextmanager
+def connection():
+    """Borrow this thread's pooled connection for the duration of the block.
+
+    Commit explicitly; an exception or a missing commit rolls the
+    transaction back. Async code should go through `run_db` rather than
+    borrowing the event loop thread's connection.
+    """
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        _pool.release(conn)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="sqlite")
+        return _executor
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run `fn(conn, *args, **kwargs)` on a database thread and await it.
+
+    Async handlers use this instead of querying on the event loop, so a
+    slow scan only ties up one database thread. `fn` gets that thread's
+    pooled connection for the whole call, which keeps its transaction on
+    one connection and thread.
+    """
+    queued = time.perf_counter()
+
+    def call():
+        # Time spent waiting for a free database thread vs. running `fn`
+        metrics.observe("db_seconds", time.perf_counter() - queued, phase="queue")
+        with connection() as conn, metrics.timer("db_seconds", phase="query"):
+            return fn(conn, *args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+
+
+def close_connections():
+    """Stop the database threads and close every pooled connection."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    _pool.close_all()
+
+
+def _ensure_column(conn, table, column, decl):
+    """Add `column` to `table` if an existing database does not have it yet."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def get_setting(conn, key, default=None):
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
 def init_db():
     """Create schema and seed default users if needed."""
-    conn = get_connection()
+    conn = connect()
 
     # Create items table with phone instead of email
     conn.execute(
@@ -24,8 +162,147 @@ def init_db():
             location TEXT NOT NULL,
             phone TEXT NOT NULL,
             image_path TEXT,
-            embedding TEXT,
-            status TEXT DEFAULT 'Yet to be found'
+            embedding BLOB,
+            embedding_dim INTEGER,
+            embedding_dtype TEXT,
+            embedding_model TEXT,
+            status TEXT DEFAULT 'Yet to be found',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Older databases predate the binary embedding metadata columns
+    _ensure_column(conn, "items", "embedding_dim", "INTEGER")
+    _ensure_column(conn, "items", "embedding_dtype", "TEXT")
+    # 'ready' once the vector is stored; 'pending' while queued for ingestion
+    _ensure_column(conn, "items", "embedding_status", "TEXT DEFAULT 'ready'")
+    _ensure_column(conn, "items", "embedding_model", "TEXT")
+    # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so older databases
+    # get the column bare and the trigger stamps new rows; rows created
+    # before the upgrade keep a NULL date
+    _ensure_column(conn, "items", "created_at", "TEXT")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS items_created_at AFTER INSERT ON items
+        WHEN NEW.created_at IS NULL
+        BEGIN
+            UPDATE items SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+        """
+    )
+
+    # Indexes for the search filters
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_items_category ON items(category)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_items_status ON items(status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_items_created_at ON items(created_at)")
+
+    _create_fts(conn)
+    _create_matches(conn)
+
+    # Key/value settings; `active_model` names the model whose vectors are
+    # stored in items.embedding and served by search
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO settings (key, value) VALUES ('active_model', ?)",
+        (MODEL_NAME,),
+    )
+    # Vectors written before models were recorded belong to the active model
+    conn.execute(
+        """
+        UPDATE items SET embedding_model = (SELECT value FROM settings WHERE key = 'active_model')
+        WHERE embedding_model IS NULL AND embedding IS NOT NULL
+        """
+    )
+
+    # Vectors for a model that is being built next to the active one; they
+    # are moved into items.embedding when that model is activated
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS item_embeddings (
+            item_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            embedding_dim INTEGER NOT NULL,
+            embedding_dtype TEXT NOT NULL,
+            PRIMARY KEY (item_id, model_name)
+        )
+        """
+    )
+
+    # Persistent queue of embedding jobs for asynchronous ingestion
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS embedding_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL,
+            status TEXT CHECK(status IN ('queued', 'running', 'failed')) NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_embedding_jobs_status ON embedding_jobs(status, id)"
+    )
+
+    # Stored upload files by content: SHA-256 plus the 64-bit difference
+    # hash, split into four indexed 16-bit bands for near-duplicate lookups
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS images (
+            image_path TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            phash INTEGER,
+            phash_band0 INTEGER,
+            phash_band1 INTEGER,
+            phash_band2 INTEGER,
+            phash_band3 INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_images_sha256 ON images(sha256)")
+    for band in range(4):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_images_band{band} ON images(phash_band{band})"
+        )
+
+    # Image-only embeddings per content hash, reused when the same or a
+    # near-identical photo is uploaded again
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS image_embeddings (
+            sha256 TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            embedding_dim INTEGER NOT NULL,
+            embedding_dtype TEXT NOT NULL,
+            PRIMARY KEY (sha256, model_name)
+        )
+        """
+    )
+
+    # Checkpoints of the re-embedding tool (reembed.py), one row per model
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reembed_progress (
+            model_name TEXT PRIMARY KEY,
+            last_item_id INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            finished_at TEXT
         )
         """
     )
@@ -52,6 +329,205 @@ def init_db():
         ("S12345", "pass123", "student"),
     )
 
+    _create_counters(conn)
+
     conn.commit()
     conn.close()
 
+
+# Keyword index over the item text for /search, an external-content FTS5
+# table that the triggers keep in step with every write to items
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items
+BEGIN
+    INSERT INTO items_fts (rowid, title, description, category, location)
+    VALUES (NEW.id, NEW.title, NEW.description, NEW.category, NEW.location);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items
+BEGIN
+    INSERT INTO items_fts (items_fts, rowid, title, description, category, location)
+    VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.category, OLD.location);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF title, description, category, location ON items
+BEGIN
+    INSERT INTO items_fts (items_fts, rowid, title, description, category, location)
+    VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.category, OLD.location);
+    INSERT INTO items_fts (rowid, title, description, category, location)
+    VALUES (NEW.id, NEW.title, NEW.description, NEW.category, NEW.location);
+END;
+"""
+
+
+def _create_fts(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            title, description, category, location,
+            content='items', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    for statement in _FTS_TRIGGERS.split("END;"):
+        if statement.strip():
+            conn.execute(statement + "END")
+    if not exists:
+        # Index the items stored before the keyword index existed
+        conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+
+
+# Which side of the board an item is on: student reports carry Lost/Found
+# in the category, admin-entered items in the status. Queries must use this
+# exact expression to hit idx_items_side.
+ITEM_SIDE = (
+    "CASE WHEN category IN ('Lost', 'Found') THEN category"
+    " WHEN status = 'Found' THEN 'Found'"
+    " WHEN status IN ('Lost', 'Yet to be found') THEN 'Lost' END"
+)
+
+# Precomputed lost/found candidate pairs (see utils/matches.py); a pair is
+# dropped as soon as either item is resolved or deleted
+_MATCH_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS matches_item_delete AFTER DELETE ON items
+BEGIN
+    DELETE FROM matches WHERE lost_id = OLD.id OR found_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS matches_item_resolved AFTER UPDATE OF status ON items
+WHEN NEW.status = 'Resolved'
+BEGIN
+    DELETE FROM matches WHERE lost_id = OLD.id OR found_id = OLD.id;
+END;
+"""
+
+
+def _create_matches(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS matches (
+            lost_id INTEGER NOT NULL,
+            found_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            model TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (lost_id, found_id)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_found ON matches(found_id)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_items_side ON items(({ITEM_SIDE}), status)")
+    for statement in _MATCH_TRIGGERS.split("END;"):
+        if statement.strip():
+            conn.execute(statement + "END")
+
+
+# Row counts kept up to date by triggers in the same transaction as the
+# change, so statistics read a handful of counter rows instead of scanning
+_COUNTER_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS item_counts_insert AFTER INSERT ON items
+BEGIN
+    INSERT INTO item_counts (category, status, count) VALUES (NEW.category, COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (category, status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS item_counts_delete AFTER DELETE ON items
+BEGIN
+    UPDATE item_counts SET count = count - 1
+    WHERE category = OLD.category AND status = COALESCE(OLD.status, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS item_counts_update AFTER UPDATE OF category, status ON items
+WHEN OLD.category IS NOT NEW.category OR OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE item_counts SET count = count - 1
+    WHERE category = OLD.category AND status = COALESCE(OLD.status, '');
+    INSERT INTO item_counts (category, status, count) VALUES (NEW.category, COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (category, status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_counts_insert AFTER INSERT ON users
+BEGIN
+    INSERT INTO user_counts (role, count) VALUES (NEW.role, 1)
+    ON CONFLICT (role) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_counts_delete AFTER DELETE ON users
+BEGIN
+    UPDATE user_counts SET count = count - 1 WHERE role = OLD.role;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_counts_update AFTER UPDATE OF role ON users
+WHEN OLD.role IS NOT NEW.role
+BEGIN
+    UPDATE user_counts SET count = count - 1 WHERE role = OLD.role;
+    INSERT INTO user_counts (role, count) VALUES (NEW.role, 1)
+    ON CONFLICT (role) DO UPDATE SET count = count + 1;
+END;
+"""
+
+# The same groups counted from the base tables, for rebuilds and checks
+_ITEM_GROUPS = "SELECT category, COALESCE(status, '') AS status, COUNT(*) AS count FROM items GROUP BY 1, 2"
+_USER_GROUPS = "SELECT role, COUNT(*) AS count FROM users GROUP BY role"
+
+
+def _create_counters(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'item_counts'"
+    ).fetchone()
+    # One row per (category, status) group and per role
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS item_counts (
+            category TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (category, status)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_counts (
+            role TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    for statement in _COUNTER_TRIGGERS.split("END;"):
+        if statement.strip():
+            conn.execute(statement + "END")
+    if not exists:
+        # Databases that predate the counters: seed them from the tables
+        rebuild_counters(conn)
+
+
+def rebuild_counters(conn):
+    """Recompute item_counts and user_counts from items and users (caller commits)."""
+    conn.execute("DELETE FROM item_counts")
+    conn.execute(f"INSERT INTO item_counts (category, status, count) {_ITEM_GROUPS}")
+    conn.execute("DELETE FROM user_counts")
+    conn.execute(f"INSERT INTO user_counts (role, count) {_USER_GROUPS}")
+
+
+def counter_drift(conn):
+    """Compare the counters with a fresh count of the base tables.
+
+    Returns (table, group, stored, actual) tuples for every group that
+    disagrees; an empty list means the counters are consistent.
+    """
+    drift = []
+    for table, groups, key in (
+        ("item_counts", _ITEM_GROUPS, ("category", "status")),
+        ("user_counts", _USER_GROUPS, ("role",)),
+    ):
+        actual = {tuple(r[k] for k in key): r["count"] for r in conn.execute(groups)}
+        stored = {tuple(r[k] for k in key): r["count"] for r in conn.execute(f"SELECT * FROM {table}")}
+        for group in sorted(set(actual) | set(stored)):
+            if actual.get(group, 0) != stored.get(group, 0):
+                drift.append((table, group, stored.get(group, 0), actual.get(group, 0)))
+    return drift
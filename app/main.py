@@ -1,14 +1,23 @@
-from fastapi import FastAPI, Request, Form, Depends, HTTPException
+from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import sqlite3
+import asyncio
+import time
+from contextlib import nullcontext
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
-from .routes import auth, items, search, admin
+from .routes import auth, items, search, admin, system
 from .utils.auth import authenticate_user
-from .config import UPLOAD_DIR
-from .database import init_db, get_connection
+from .config import UPLOAD_DIR, WARM_UP_ON_STARTUP, ASYNC_INGEST, PAGE_SIZE, SERVER_TIMING, SEARCH_MODE
+from .database import init_db, connection, close_connections, run_db
+from .utils.vector_index import embedding_index
+from .utils.item_listing import fetch_item_page
+from .utils.model_versions import load_active_model
+from .utils.inference import shutdown_executor, warm_up
+from .utils.metrics import metrics, server_timing
+from .utils.profiling import request_profiler
+from .utils import ingest_queue
 
 # Base directory for resolving paths
 BASE_DIR = Path(__file__).resolve().parent
@@ -25,6 +34,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """Add a Server-Timing header and profile requests picked by the sampler.
+
+    Stage durations come from the `metrics.stage` timers on the search and
+    ingest paths, plus the total time until the response starts.
+    """
+    profiler = request_profiler.start() if request_profiler.should_profile(request.headers) else None
+    start = time.perf_counter()
+    try:
+        with metrics.collect_stages() if SERVER_TIMING else nullcontext([]) as stages:
+            response = await call_next(request)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    total = time.perf_counter() - start
+
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(stages, total)
+    if profiler is not None:
+        name = await asyncio.to_thread(
+            request_profiler.save, profiler, request.method, request.url.path, total
+        )
+        response.headers["X-Profile-Name"] = name
+    return response
+
 # Mount static and upload directories
 app.mount("/uploads", StaticFiles(directory=PROJECT_ROOT / UPLOAD_DIR), name="uploads")
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
@@ -34,23 +70,44 @@ app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 # Set up Jinja2 templates
 templates = Jinja2Templates(directory=BASE_DIR / "templates")
 
-# Dependency to get DB connection
-def get_db():
-    """Dependency to get a database connection and close it after the request."""
-    conn = get_connection()
-    try:
-        yield conn
-    finally:
-        conn.close()
-
 # Initialize database and tables at startup
 init_db()
 
+# Load the active model's stored embeddings into the in-memory search index
+with connection() as _conn:
+    embedding_index.load(_conn, load_active_model(_conn))
+
+# Load and warm up the model in the background so startup stays fast;
+# /ready reports when inference is available
+_background_tasks = set()
+
+
+@app.on_event("startup")
+async def start_model_warm_up():
+    if WARM_UP_ON_STARTUP:
+        task = asyncio.create_task(warm_up())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@app.on_event("startup")
+async def start_ingest_workers():
+    if ASYNC_INGEST:
+        ingest_queue.start_workers()
+
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    await ingest_queue.stop_workers()
+    shutdown_executor()
+    close_connections()
+
 # Include modular routers
 app.include_router(items.router, tags=["Items"])
 app.include_router(search.router, tags=["Search"])
 app.include_router(auth.router, tags=["Auth"])
 app.include_router(admin.router, tags=["Admin"])
+app.include_router(system.router, tags=["System"])
 
 # Serve login page at root
 @app.get("/", response_class=HTMLResponse)
@@ -63,9 +120,8 @@ async def login(
     request: Request,
     student_id: str = Form(...),
     passcode: str = Form(...),
-    conn: sqlite3.Connection = Depends(get_db),
 ):
-    role = authenticate_user(student_id, passcode)
+    role = await run_db(authenticate_user, student_id, passcode)
     if not role:
         return templates.TemplateResponse(
             "login.html",
@@ -73,24 +129,24 @@ async def login(
         )
     if role == "admin":
         return RedirectResponse(url="/admin-dashboard", status_code=303)
-    # Student view: load items for index.html
-    items = conn.execute(
-        "SELECT id, title, description, category, location, phone, image_path FROM items ORDER BY id DESC"
-    ).fetchall()
+    # Student view: first page of items for index.html, the rest on demand
+    page = await run_db(fetch_item_page, limit=PAGE_SIZE)
     return templates.TemplateResponse(
         "index.html",
-        {"request": request, "student_id": student_id, "items": items},
+        {"request": request, "student_id": student_id, "page": page, "search_mode": SEARCH_MODE},
     )
 
 # Student report page (optional direct access)
 @app.get("/report", response_class=HTMLResponse)
-async def report_page(request: Request, conn: sqlite3.Connection = Depends(get_db)):
-    items = conn.execute(
-        "SELECT id, title, description, category, location, phone, image_path FROM items ORDER BY id DESC"
-    ).fetchall()
+async def report_page(
+    request: Request,
+    after_id: int | None = None,
+    limit: int = PAGE_SIZE,
+):
+    page = await run_db(fetch_item_page, after_id, limit)
     return templates.TemplateResponse(
         "index.html",
-        {"request": request, "student_id": "student", "items": items},
+        {"request": request, "student_id": "student", "page": page, "search_mode": SEARCH_MODE},
     )
 
 @app.get("/logout", response_class=HTMLResponse)
@@ -107,21 +163,25 @@ async def change_password(
     student_id: str = Form(...),
     old_passcode: str = Form(...),
     new_passcode: str = Form(...),
-    conn: sqlite3.Connection = Depends(get_db),
 ):
-    user = conn.execute(
-        "SELECT passcode FROM users WHERE student_id = ?", (student_id,)
-    ).fetchone()
-    if not user or user[0] != old_passcode:
+    def update(conn):
+        user = conn.execute(
+            "SELECT passcode FROM users WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        if not user or user[0] != old_passcode:
+            return False
+        conn.execute(
+            "UPDATE users SET passcode = ? WHERE student_id = ?",
+            (new_passcode, student_id),
+        )
+        conn.commit()
+        return True
+
+    if not await run_db(update):
         return templates.TemplateResponse(
             "change_password.html",
             {"request": request, "error": "Invalid credentials"},
         )
-    conn.execute(
-        "UPDATE users SET passcode = ? WHERE student_id = ?",
-        (new_passcode, student_id),
-    )
-    conn.commit()
     return templates.TemplateResponse(
         "change_password.html",
         {
@@ -141,7 +201,6 @@ async def forgot_password(
     student_id: str = Form(...),
     new_passcode: str = Form(...),
     confirm_passcode: str = Form(...),
-    conn: sqlite3.Connection = Depends(get_db),
 ):
     """Reset password for user who forgot it."""
     # Check if passcodes match
@@ -152,9 +211,11 @@ async def forgot_password(
         )
     
     # Check if student ID exists
-    user = conn.execute(
-        "SELECT id FROM users WHERE student_id = ?", (student_id,)
-    ).fetchone()
+    user = await run_db(
+        lambda conn: conn.execute(
+            "SELECT id FROM users WHERE student_id = ?", (student_id,)
+        ).fetchone()
+    )
     if not user:
         return templates.TemplateResponse(
             "forgot_password.html",
@@ -169,12 +230,15 @@ async def forgot_password(
         )
     
     # Update passcode
-    try:
+    def update(conn):
         conn.execute(
             "UPDATE users SET passcode = ? WHERE student_id = ?",
             (new_passcode, student_id),
         )
         conn.commit()
+
+    try:
+        await run_db(update)
         return templates.TemplateResponse(
             "forgot_password.html",
             {
@@ -189,12 +253,27 @@ async def forgot_password(
         )
 
 @app.get("/admin-dashboard", response_class=HTMLResponse)
-async def admin_dashboard(request: Request, conn: sqlite3.Connection = Depends(get_db)):
-    items = conn.execute("SELECT id, title, description, category, location, phone, image_path, status FROM items ORDER BY id DESC").fetchall()
-    items = []
-    for item in conn.execute("SELECT id, title, description, category, location, phone, image_path, status FROM items ORDER BY id DESC").fetchall():
-        item_dict = dict(item)
-        if item_dict["image_path"]:
-            item_dict["image_path"] = f"/uploads/{item_dict['image_path']}"
-        items.append(item_dict)
-    return templates.TemplateResponse("admin_dashboard.html", {"request": request, "items": items})
+async def admin_dashboard(
+    request: Request,
+    after_id: int | None = None,
+    limit: int = PAGE_SIZE,
+):
+    def query(conn):
+        page = fetch_item_page(conn, after_id, limit)
+        # Totals for the statistics tab come from the counter table that
+        # triggers keep in step with items, not from the rendered rows
+        stats = dict(conn.execute(
+            """
+            SELECT COALESCE(SUM(count), 0) AS total,
+                   COALESCE(SUM(CASE WHEN status = 'Lost' OR category = 'Lost' THEN count END), 0) AS lost,
+                   COALESCE(SUM(CASE WHEN status = 'Found' OR category = 'Found' THEN count END), 0) AS found,
+                   COALESCE(SUM(CASE WHEN status = 'Resolved' THEN count END), 0) AS resolved
+            FROM item_counts
+            """
+        ).fetchone())
+        return page, stats
+
+    page, stats = await run_db(query)
+    return templates.TemplateResponse(
+        "admin_dashboard.html", {"request": request, "page": page, "stats": stats}
+    )
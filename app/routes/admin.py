@@ -1,6 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, HTTPException, Form
+from fastapi.responses import FileResponse
+import asyncio
 import sqlite3
-from ..database import get_connection
+from ..config import PHASH_MAX_DISTANCE
+from ..database import run_db
+from ..utils.image_store import duplicate_groups
+from ..utils.matches import rematch_stored
+from ..utils.model_versions import activate_model, item_write, list_models, reload_index
+from ..utils.profiling import request_profiler
+from ..utils.vector_index import embedding_index, item_state
 
 router = APIRouter(tags=["Admin"])
 
@@ -8,15 +16,18 @@ router = APIRouter(tags=["Admin"])
 # ============ USER MANAGEMENT ============
 
 @router.get("/users")
-async def get_users(conn: sqlite3.Connection = Depends(get_connection)):
+async def get_users():
     """Get all users from the database."""
-    try:
+
+    def query(conn):
         cursor = conn.execute("SELECT id, student_id, role FROM users ORDER BY student_id")
-        users = [
+        return [
             {"id": row[0], "student_id": row[1], "role": row[2]}
             for row in cursor.fetchall()
         ]
-        return users
+
+    try:
+        return await run_db(query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
@@ -26,18 +37,20 @@ async def add_user(
     student_id: str = Form(...),
     passcode: str = Form(...),
     role: str = Form(...),
-    conn: sqlite3.Connection = Depends(get_connection),
 ):
     """Add a new user."""
     if role not in ["student", "admin"]:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    try:
+    def insert(conn):
         conn.execute(
             "INSERT INTO users (student_id, passcode, role) VALUES (?, ?, ?)",
             (student_id, passcode, role),
         )
         conn.commit()
+
+    try:
+        await run_db(insert)
         return {"message": "User added successfully", "student_id": student_id}
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Student ID already exists")
@@ -48,16 +61,19 @@ async def add_user(
 @router.delete("/delete-user/{user_id}")
 async def delete_user(
     user_id: int,
-    conn: sqlite3.Connection = Depends(get_connection),
 ):
     """Delete a user by ID."""
-    try:
+
+    def delete(conn):
         cursor = conn.execute("SELECT id FROM users WHERE id = ?", (user_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="User not found")
 
         conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
         conn.commit()
+
+    try:
+        await run_db(delete)
         return {"message": "User deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting user: {str(e)}")
@@ -69,26 +85,26 @@ async def update_user(
     student_id: str = Form(None),
     passcode: str = Form(None),
     role: str = Form(None),
-    conn: sqlite3.Connection = Depends(get_connection),
 ):
     """Update user information."""
-    try:
+
+    def update(conn):
         user = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        student_id = student_id or user[1]
-        passcode = passcode or user[2]
-        role = role or user[3]
-
-        if role not in ["student", "admin"]:
+        new_role = role or user[3]
+        if new_role not in ["student", "admin"]:
             raise HTTPException(status_code=400, detail="Invalid role")
 
         conn.execute(
             "UPDATE users SET student_id = ?, passcode = ?, role = ? WHERE id = ?",
-            (student_id, passcode, role, user_id),
+            (student_id or user[1], passcode or user[2], new_role, user_id),
         )
         conn.commit()
+
+    try:
+        await run_db(update)
         return {"message": "User updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating user: {str(e)}")
@@ -100,53 +116,139 @@ async def update_user(
 async def update_item_status(
     item_id: int,
     status: str = Form(...),
-    conn: sqlite3.Connection = Depends(get_connection),
 ):
     """Update the status of an item."""
     valid_statuses = ["Yet to be found", "Lost", "Found", "Resolved"]
     if status not in valid_statuses:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    try:
+    def update(conn):
         cursor = conn.execute("SELECT id FROM items WHERE id = ?", (item_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Item not found")
 
         conn.execute("UPDATE items SET status = ? WHERE id = ?", (status, item_id))
+        state = item_state(conn, item_id)
         conn.commit()
+        return state
+
+    try:
+        async with item_write():
+            embedding_index.set_state(item_id, await run_db(update))
+        # Resolving drops the item's matches (trigger); other changes can
+        # move it to the other side or reopen it
+        if status != "Resolved":
+            await rematch_stored(item_id)
         return {"message": f"Item status updated to {status}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating status: {str(e)}")
 
 
 @router.get("/item-stats")
-async def get_item_stats(conn: sqlite3.Connection = Depends(get_connection)):
+async def get_item_stats():
     """Get statistics about items and users."""
+
+    def query(conn):
+        # Read from the trigger-maintained counter tables (one row per
+        # category/status group and per role) instead of scanning
+        items = conn.execute(
+            """
+            SELECT COALESCE(SUM(count), 0) AS total,
+                   COALESCE(SUM(CASE WHEN status = 'Lost' THEN count END), 0) AS lost,
+                   COALESCE(SUM(CASE WHEN status = 'Found' THEN count END), 0) AS found,
+                   COALESCE(SUM(CASE WHEN status = 'Resolved' THEN count END), 0) AS resolved
+            FROM item_counts
+            """
+        ).fetchone()
+        users = conn.execute(
+            """
+            SELECT COALESCE(SUM(count), 0) AS total,
+                   COALESCE(SUM(CASE WHEN role = 'admin' THEN count END), 0) AS admins
+            FROM user_counts
+            """
+        ).fetchone()
+        return {"items": dict(items), "users": dict(users)}
+
     try:
-        items_total = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
-        items_lost = conn.execute(
-            "SELECT COUNT(*) FROM items WHERE status = 'Lost'"
-        ).fetchone()[0]
-        items_found = conn.execute(
-            "SELECT COUNT(*) FROM items WHERE status = 'Found'"
-        ).fetchone()[0]
-        items_resolved = conn.execute(
-            "SELECT COUNT(*) FROM items WHERE status = 'Resolved'"
-        ).fetchone()[0]
-
-        users_total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-        admins_total = conn.execute(
-            "SELECT COUNT(*) FROM users WHERE role = 'admin'"
-        ).fetchone()[0]
-
-        return {
-            "items": {
-                "total": items_total,
-                "lost": items_lost,
-                "found": items_found,
-                "resolved": items_resolved,
-            },
-            "users": {"total": users_total, "admins": admins_total},
-        }
+        return await run_db(query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
+
+
+@router.get("/duplicate-images")
+async def get_duplicate_images(max_distance: int = PHASH_MAX_DISTANCE):
+    """List groups of items reported with the same or a near-identical photo."""
+    if not 0 <= max_distance <= 16:
+        raise HTTPException(status_code=400, detail="max_distance must be between 0 and 16")
+    try:
+        groups = await run_db(duplicate_groups, max_distance)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching duplicates: {str(e)}")
+    return {"groups": groups, "total": len(groups)}
+
+
+# ============ EMBEDDING MODELS ============
+
+@router.get("/embedding-models")
+async def get_embedding_models():
+    """List the active embedding model and any staged replacement."""
+    try:
+        return await run_db(list_models)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching models: {str(e)}")
+
+
+@router.post("/embedding-models/activate")
+async def activate_embedding_model(
+    model_name: str = Form(...),
+    force: bool = Form(False),
+):
+    """Cut search over to a staged embedding model built with reembed.py --model."""
+    try:
+        result = await activate_model(model_name, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error activating model: {str(e)}")
+    return {"message": f"Search now uses {model_name}", **result}
+
+
+@router.post("/embedding-models/reload")
+async def reload_embedding_index():
+    """Reload the search index after reembed.py rewrote the active model's vectors in place."""
+    try:
+        result = await reload_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading index: {str(e)}")
+    return {"message": "Search index reloaded", **result}
+
+
+# ============ PROFILING ============
+
+@router.get("/profiling")
+async def get_profiling():
+    """Show the request profiler's settings and the stored profiles."""
+    profiles = await asyncio.to_thread(request_profiler.list_profiles)
+    return {**request_profiler.settings(), "profiles": profiles, "total": len(profiles)}
+
+
+@router.post("/profiling")
+async def update_profiling(
+    enabled: bool = Form(...),
+    sample_rate: float | None = Form(None),
+):
+    """Turn sampled request profiling on or off and set the sampled share of requests."""
+    try:
+        request_profiler.configure(enabled=enabled, sample_rate=sample_rate)
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Profiling {'enabled' if enabled else 'disabled'}", **request_profiler.settings()}
+
+
+@router.get("/profiling/{name}")
+async def download_profile(name: str):
+    """Download one stored profile as an HTML report."""
+    path = request_profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/html", filename=name)
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Form, File, UploadFile, HTTPException
-from ..database import get_connection
-from ..utils.embeddings import get_embedding
-from ..utils.image_utils import save_image
-import json
+from fastapi import APIRouter, Form, File, UploadFile, HTTPException, Query
+from ..database import run_db
+from ..utils.inference import embed
+from ..utils.image_utils import delete_image, rendition_url, save_image
+from ..utils.image_store import register_image, release_image
+from ..utils.vector_index import embedding_index, item_state
+from ..utils.model_versions import get_active_model, index_embedding, item_write
+from ..utils.embedding_codec import pack_embedding
+from ..utils.ingest_queue import enqueue_embedding, notify_workers
+from ..utils.bulk_import import import_items, iter_manifest, manifest_format
+from ..utils.item_listing import FULL_COLUMNS, clamp_limit, fetch_item_page, image_url
+from ..utils.matches import fetch_matches, update_matches
+from ..utils.metrics import metrics
+from ..config import ASYNC_INGEST, PAGE_SIZE, MATCH_TOP_K
 from pathlib import Path
+import asyncio
 
 router = APIRouter()
 
 
 @router.post("/add-item")
+@metrics.timed("add_item")
 async def add_item(
     title: str = Form(...),
     description: str = Form(...),
@@ -21,71 +32,153 @@ async def add_item(
     if not title or not description or not category or not location or not phone:
         raise HTTPException(status_code=400, detail="All fields are required")
 
-    image_path, image_data = (None, None)
+    image_path, image_data, fingerprint = (None, None, None)
     if image:
-        image_path, image_data = save_image(image)
+        # Writing the file and its renditions happens off the event loop
+        with metrics.stage("add_item.save_image"):
+            image_path, image_data, fingerprint = await asyncio.to_thread(save_image, image)
+
+    if ASYNC_INGEST:
+        # Store the row now and let the ingestion workers embed it
+        def insert_pending(conn):
+            cursor = conn.execute(
+                "INSERT INTO items (title, description, category, location, phone, image_path, embedding_status) VALUES (?, ?, ?, ?, ?, ?, 'pending')",
+                (title, description, category, location, phone, image_path),
+            )
+            if image_path:
+                register_image(conn, image_path, *fingerprint)
+            enqueue_embedding(conn, cursor.lastrowid)
+            conn.commit()
+            return cursor.lastrowid
+
+        item_id = await run_db(insert_pending)
+        notify_workers()
+        return {
+            "message": "Item added successfully",
+            "title": title,
+            "id": item_id,
+            "embedding_status": "pending",
+        }
 
     # Generate embedding with title + description for better text matching
-    embedding = get_embedding(text=description, image_data=image_data, title=title)
+    async with item_write():
+        model_name = get_active_model()
+        with metrics.stage("add_item.embed"):
+            embedding = await embed(text=description, image_data=image_data, title=title, model_name=model_name)
 
-    conn = get_connection()
+        blob, dim, dtype = pack_embedding(embedding)
+
+        def insert(conn):
+            cursor = conn.execute(
+                "INSERT INTO items (title, description, category, location, phone, image_path, embedding, embedding_dim, embedding_dtype, embedding_model) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    title,
+                    description,
+                    category,
+                    location,
+                    phone,
+                    image_path,
+                    blob,
+                    dim,
+                    dtype,
+                    model_name,
+                ),
+            )
+            if image_path:
+                register_image(conn, image_path, *fingerprint)
+            state = item_state(conn, cursor.lastrowid)
+            conn.commit()
+            return cursor.lastrowid, state
+
+        with metrics.stage("add_item.insert"):
+            item_id, state = await run_db(insert)
+        index_embedding(item_id, embedding, model_name, state)
+    with metrics.stage("add_item.matches"):
+        await update_matches([(item_id, embedding)], model_name)
+
+    return {
+        "message": "Item added successfully",
+        "title": title,
+        "id": item_id,
+        "embedding_status": "ready",
+    }
+
+@router.post("/bulk-import")
+async def bulk_import(
+    manifest: UploadFile = File(...),
+    images: list[UploadFile] = File(None),
+):
+    """Import many items from a CSV/JSONL manifest plus their image files.
+
+    Manifest columns: title, description, category, location, phone and
+    optional status and image (the filename of one of the uploaded images).
+    """
     try:
-        conn.execute(
-            "INSERT INTO items (title, description, category, location, phone, image_path, embedding) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (
-                title,
-                description,
-                category,
-                location,
-                phone,
-                image_path,
-                json.dumps(embedding.cpu().tolist()),
-            ),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+        fmt = manifest_format(manifest.filename)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return {"message": "Item added successfully", "title": title}
+    uploads = {Path(img.filename).name: img for img in images or [] if img.filename}
+
+    def load_image(name):
+        upload = uploads[Path(name).name]
+        upload.file.seek(0)
+        return upload.file.read()
 
-@router.get("/items")
-async def list_items():
-    """Return all items ordered by newest first."""
-    conn = get_connection()
     try:
-        cursor = conn.execute(
-            "SELECT id, title, description, category, location, phone, image_path FROM items ORDER BY id DESC"
-        )
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
-
-    # Normalize image paths so frontend can use them directly.
-    result = []
-    for r in rows:
-        image_path = r[6]
-        if image_path:
-            # Ensure stored filename becomes a URL under /uploads
-            if str(image_path).startswith("/uploads/"):
-                image_url = image_path
-            else:
-                image_url = f"/uploads/{image_path}"
-        else:
-            image_url = None
-
-        result.append(
-            {
-                "id": r[0],
-                "title": r[1],
-                "description": r[2],
-                "category": r[3],
-                "location": r[4],
-                "phone": r[5],
-                "image_path": image_url,
-            }
-        )
+        report = await import_items(iter_manifest(manifest.file, fmt), load_image)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {str(exc)}") from exc
 
-    return result
+    return {"message": "Bulk import completed", **report}
+
+@router.get("/items")
+async def list_items(
+    after_id: int | None = Query(None, ge=1),
+    limit: int = Query(PAGE_SIZE, ge=1),
+    slim: bool = False,
+):
+    """Return a page of items ordered by newest first.
+
+    Pass the returned `next_after_id` as `after_id` to fetch the next page;
+    `slim` trims descriptions to a short snippet for list cards.
+    """
+    return await run_db(fetch_item_page, after_id, limit, slim)
+
+@router.get("/items/{item_id}")
+async def get_item(item_id: int):
+    """Return a single item with all listing fields."""
+    row = await run_db(
+        lambda conn: conn.execute(
+            f"SELECT {FULL_COLUMNS} FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    item = dict(row)
+    item["thumbnail_path"] = rendition_url(item["image_path"], "thumbs")
+    item["medium_path"] = rendition_url(item["image_path"], "medium")
+    item["image_path"] = image_url(item["image_path"])
+    return item
+
+@router.get("/items/{item_id}/matches")
+async def get_item_matches(item_id: int, limit: int = Query(MATCH_TOP_K, ge=1)):
+    """Return the precomputed candidate matches for an item, best first.
+
+    Pairs are scored when items are added or updated, so this is a table
+    read with no model call. Resolved and deleted items drop out.
+    """
+
+    def query(conn):
+        if not conn.execute("SELECT 1 FROM items WHERE id = ?", (item_id,)).fetchone():
+            return None
+        return fetch_matches(conn, item_id, clamp_limit(limit))
+
+    matches = await run_db(query)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"item_id": item_id, "matches": matches, "total": len(matches)}
 
 @router.delete("/items/{item_id}")
 async def delete_item(item_id: int):
@@ -93,8 +186,7 @@ async def delete_item(item_id: int):
     if item_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid item ID")
 
-    conn = get_connection()
-    try:
+    def delete(conn):
         cursor = conn.execute(
             "SELECT image_path FROM items WHERE id = ?", (item_id,)
         )
@@ -102,18 +194,25 @@ async def delete_item(item_id: int):
         if not row:
             raise HTTPException(status_code=404, detail="Item not found")
 
-        image_path = row[0]
         conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+        conn.execute("DELETE FROM embedding_jobs WHERE item_id = ?", (item_id,))
+        conn.execute("DELETE FROM item_embeddings WHERE item_id = ?", (item_id,))
+        # Identical uploads share a file; keep it while other items use it
+        orphaned = row[0] and release_image(conn, row[0])
         conn.commit()
-    finally:
-        conn.close()
+        return row[0] if orphaned else None
+
+    async with item_write():
+        image_path = await run_db(delete)
+        embedding_index.remove(item_id)
 
     if image_path:
-        Path(image_path).unlink(missing_ok=True)
+        await asyncio.to_thread(delete_image, image_path)
 
     return {"message": "Item deleted", "id": item_id}
 
 @router.post("/update-item/{item_id}")
+@metrics.timed("update_item")
 async def update_item(
     item_id: int,
     title: str = Form(...),
@@ -124,25 +223,44 @@ async def update_item(
     image: UploadFile = File(None),
 ):
     try:
-        image_path, image_data = (None, None)
+        image_path, image_data, fingerprint = (None, None, None)
         if image:
-            image_path, image_data = save_image(image)
+            with metrics.stage("update_item.save_image"):
+                image_path, image_data, fingerprint = await asyncio.to_thread(save_image, image)
 
-        embedding = get_embedding(text=description, image_data=image_data)
-        conn = get_connection()
+        async with item_write():
+            model_name = get_active_model()
+            with metrics.stage("update_item.embed"):
+                embedding = await embed(text=description, image_data=image_data, model_name=model_name)
+            blob, dim, dtype = pack_embedding(embedding)
+            def update(conn):
+                if image_path:
+                    conn.execute(
+                        "UPDATE items SET title=?, description=?, category=?, location=?, phone=?, image_path=?, embedding=?, embedding_dim=?, embedding_dtype=?, embedding_model=?, embedding_status='ready' WHERE id=?",
+                        (title, description, category, location, phone, image_path, blob, dim, dtype, model_name, item_id),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE items SET title=?, description=?, category=?, location=?, phone=?, embedding=?, embedding_dim=?, embedding_dtype=?, embedding_model=?, embedding_status='ready' WHERE id=?",
+                        (title, description, category, location, phone, blob, dim, dtype, model_name, item_id),
+                    )
+                # A staged vector for a model being rolled out is now out of date
+                conn.execute("DELETE FROM item_embeddings WHERE item_id = ?", (item_id,))
+                # A new category can move the item to the other side
+                state = item_state(conn, item_id)
+                if image_path and state:
+                    register_image(conn, image_path, *fingerprint)
 
-        if image_path:
-            conn.execute(
-                "UPDATE items SET title=?, description=?, category=?, location=?, phone=?, image_path=?, embedding=? WHERE id=?",
-                (title, description, category, location, phone, image_path, json.dumps(embedding.cpu().tolist()), item_id),
-            )
-        else:
-            conn.execute(
-                "UPDATE items SET title=?, description=?, category=?, location=?, phone=?, embedding=? WHERE id=?",
-                (title, description, category, location, phone, json.dumps(embedding.cpu().tolist()), item_id),
-            )
+                conn.commit()
+                return state
 
-        conn.commit()
+            with metrics.stage("update_item.update"):
+                updated = await run_db(update)
+            if updated:
+                index_embedding(item_id, embedding, model_name, updated)
+        if updated:
+            with metrics.stage("update_item.matches"):
+                await update_matches([(item_id, embedding)], model_name)
         return {"message": "Item updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update item: {str(e)}")
@@ -150,9 +268,16 @@ async def update_item(
 @router.post("/mark-resolved/{item_id}")
 async def mark_resolved(item_id: int):
     try:
-        conn = get_connection()
-        conn.execute("UPDATE items SET status = 'Resolved' WHERE id = ?", (item_id,))
-        conn.commit()
+        def resolve(conn):
+            conn.execute("UPDATE items SET status = 'Resolved' WHERE id = ?", (item_id,))
+            state = item_state(conn, item_id)
+            conn.commit()
+            return state
+
+        async with item_write():
+            state = await run_db(resolve)
+            if state:
+                embedding_index.set_state(item_id, state)
         return {"message": "Item marked as resolved"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update status: {str(e)}")
@@ -1,18 +1,71 @@
 from fastapi import APIRouter, Form, File, UploadFile, HTTPException
-from ..utils.embeddings import get_embedding
-from ..database import get_connection
-import torch, json, io
-from torch.nn.functional import cosine_similarity
+from ..utils.inference import embed
+from ..database import run_db
+from ..utils.vector_index import embedding_index
+from ..utils.image_utils import read_upload, rendition_url
+from ..utils.hybrid_search import fuse_rankings, keyword_search
+from ..utils.metrics import metrics
+from ..config import SEARCH_TOP_K, SIMILARITY_THRESHOLD, SEARCH_MODE, HYBRID_CANDIDATES
+from datetime import date
+import asyncio
 
 router = APIRouter()
 
+SEARCH_MODES = ("vector", "keyword", "hybrid")
+
+
+def _filter_clause(category, location, status, date_from, date_to):
+    """Build the SQL condition and parameters for the explicit search filters.
+
+    Returns (None, ()) when nothing needs filtering. Leaving out resolved
+    items is not part of it: the vector index keeps a mask for that.
+    """
+    conditions, params = [], []
+    if category:
+        conditions.append("category = ?")
+        params.append(category)
+    if location:
+        conditions.append("instr(lower(location), lower(?)) > 0")
+        params.append(location)
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    for value, condition in ((date_from, "created_at >= ?"), (date_to, "created_at < date(?, '+1 day')")):
+        if value:
+            try:
+                params.append(date.fromisoformat(value).isoformat())
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid date {value!r}, expected YYYY-MM-DD")
+            conditions.append(condition)
+    if not conditions:
+        return None, ()
+    return " AND ".join(conditions), tuple(params)
+
 
 @router.post("/search")
-async def search_items(description: str = Form(""), image: UploadFile | None = File(None)):
-    """Search items by text and/or image using embedding similarity.
+@metrics.timed("search")
+async def search_items(
+    description: str = Form(""),
+    image: UploadFile | None = File(None),
+    mode: str = Form(SEARCH_MODE),
+    category: str = Form(""),
+    location: str = Form(""),
+    status: str = Form(""),
+    date_from: str = Form(""),
+    date_to: str = Form(""),
+    include_resolved: bool = Form(False),
+):
+    """Search items by text and/or image.
 
     - Text-only searches: send `description` (may be empty string by default).
     - Image-only searches: send only `image`.
+    - `mode`: "vector" ranks by CLIP similarity, "keyword" by BM25 over
+      title, description, category and location without running the
+      model, and "hybrid" merges both rankings with reciprocal rank fusion
+      (image-only searches are always vector searches).
+    - Optional filters: `category`, `location` (substring), `status` and a
+      `date_from`/`date_to` range on the creation date. Resolved items are
+      left out unless `include_resolved` is set or `status` asks for them.
     """
     has_text = bool(description and description.strip())
     has_image = bool(image and image.filename)
@@ -22,45 +75,112 @@ async def search_items(description: str = Form(""), image: UploadFile | None = F
             status_code=400,
             detail="Please provide text description or upload an image to search",
         )
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(SEARCH_MODES)}")
+    if mode == "keyword" and not has_text:
+        raise HTTPException(status_code=400, detail="Keyword search needs a text description")
 
-    # Build query embedding
-    image_data = None
-    if has_image:
-        content = await image.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty image file")
-        image_data = io.BytesIO(content)
-
-    try:
-        query_emb = get_embedding(
-            text=description if has_text else None, image_data=image_data
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-
-    # Fetch items and compare embeddings
-    conn = get_connection()
-    try:
-        cursor = conn.execute(
-            "SELECT id, title, description, category, location, phone, image_path, embedding FROM items"
+    condition, params = _filter_clause(category, location, status, date_from, date_to)
+    exclude_resolved = not status and not include_resolved
+    use_keywords = has_text and mode in ("keyword", "hybrid")
+    use_vectors = mode != "keyword"
+    if not use_keywords:
+        mode = "vector"
+
+    async def vector_hits():
+        # Build query embedding
+        image_data = None
+        if has_image:
+            with metrics.stage("search.read_image"):
+                image_data = await asyncio.to_thread(read_upload, image)
+
+        try:
+            with metrics.stage("search.embed"):
+                query_emb = await embed(
+                    text=description if has_text else None, image_data=image_data
+                )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+        # Prefilter in SQL (indexed on category, status and created_at) so only
+        # matching items are scored; plain searches only need the index's
+        # resolved mask
+        allowed_ids = None
+        if condition:
+            with metrics.stage("search.prefilter"):
+                allowed_ids = await run_db(
+                    lambda conn: [r[0] for r in conn.execute(f"SELECT id FROM items WHERE {condition}", params)]
+                )
+            metrics.count("rows_scanned_total", len(allowed_ids), stage="search.prefilter")
+
+        # Score against the resident index off the event loop (NumPy releases
+        # the GIL), then fetch metadata for the top-k only
+        k = HYBRID_CANDIDATES if use_keywords else SEARCH_TOP_K
+        try:
+            with metrics.stage("search.score"):
+                hits = await asyncio.to_thread(
+                    embedding_index.search,
+                    query_emb.cpu().numpy(),
+                    k=k,
+                    allowed_ids=allowed_ids,
+                    exclude_resolved=exclude_resolved,
+                )
+        except ValueError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        metrics.count(
+            "rows_scanned_total",
+            len(allowed_ids) if allowed_ids is not None else len(embedding_index),
+            stage="search.score",
         )
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
 
-    if not rows:
-        return {"results": [], "message": "No items available to search"}
+        # Lower threshold to 0.45 for better image matching across different angles
+        # The L-14 model is more accurate, so this still filters out clearly unrelated items
+        return [(item_id, score) for item_id, score in hits if score > SIMILARITY_THRESHOLD]
 
-    results = []
-    for r in rows:
-        if not r[7]:
-            continue
+    async def keyword_hits():
+        keyword_condition = condition
+        if exclude_resolved:
+            keyword_condition = " AND ".join(filter(None, (condition, "status IS NOT 'Resolved'")))
+        with metrics.stage("search.keyword"):
+            ranking = await run_db(keyword_search, description, keyword_condition, params, HYBRID_CANDIDATES)
+        metrics.count("rows_scanned_total", len(ranking), stage="search.keyword")
+        return ranking
+
+    # The keyword query runs on a database thread while the model encodes
+    vector_ranking, keyword_ranking = await asyncio.gather(
+        vector_hits() if use_vectors else asyncio.sleep(0, []),
+        keyword_hits() if use_keywords else asyncio.sleep(0, []),
+    )
+    similarities = dict(vector_ranking)
+    keyword_scores = dict(keyword_ranking)
+    if mode == "hybrid":
+        hits = fuse_rankings(vector_ranking, keyword_ranking)[:SEARCH_TOP_K]
+    else:
+        hits = (vector_ranking or keyword_ranking)[:SEARCH_TOP_K]
+
+    if not hits:
+        message = "No matching items found" if len(embedding_index) or use_keywords else "No items available to search"
+        return {"results": [], "total": 0, "mode": mode, "message": message}
 
-        emb = torch.tensor(json.loads(r[7]))
-        similarity = cosine_similarity(
-            query_emb.unsqueeze(0), emb.unsqueeze(0)
-        ).item()
-        results.append(
+    placeholders = ",".join("?" for _ in hits)
+    with metrics.stage("search.fetch"):
+        rows = await run_db(
+            lambda conn: conn.execute(
+                f"SELECT id, title, description, category, location, phone, image_path, status, created_at, embedding_status FROM items WHERE id IN ({placeholders})",
+                [item_id for item_id, _ in hits],
+            ).fetchall()
+        )
+    metrics.count("rows_scanned_total", len(rows), stage="search.fetch")
+    rows_by_id = {r[0]: r for r in rows}
+
+    top_results = []
+    for item_id, score in hits:
+        r = rows_by_id.get(item_id)
+        if r is None:
+            continue
+        similarity = similarities.get(item_id)
+        keyword_score = keyword_scores.get(item_id)
+        top_results.append(
             {
                 "id": r[0],
                 "title": r[1],
@@ -69,21 +189,20 @@ async def search_items(description: str = Form(""), image: UploadFile | None = F
                 "location": r[4],
                 "phone": r[5],
                 "image_path": r[6],
-                "similarity": round(similarity, 3),
+                "thumbnail_path": rendition_url(r[6], "thumbs"),
+                "status": r[7],
+                "created_at": r[8],
+                # Keyword hits can be items whose embedding is still queued
+                "embedding_status": r[9],
+                "similarity": round(similarity, 3) if similarity is not None else None,
+                "keyword_score": round(keyword_score, 3) if keyword_score is not None else None,
+                "score": round(score, 5),
             }
         )
 
-    results = sorted(results, key=lambda x: x["similarity"], reverse=True)
-    
-    # Lower threshold to 0.45 for better image matching across different angles
-    # The L-14 model is more accurate, so this still filters out clearly unrelated items
-    filtered_results = [r for r in results if r["similarity"] > 0.45]
-    
-    # Return top 10 results to avoid overwhelming users
-    top_results = filtered_results[:10]
-
     return {
         "results": top_results,
         "total": len(top_results),
+        "mode": mode,
         "message": "Search completed successfully" if top_results else "No matching items found",
     }
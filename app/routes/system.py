@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from ..utils.inference import batcher, readiness
+from ..utils.embedding_cache import embedding_cache
+from ..utils.ingest_queue import queue_depth
+from ..utils.metrics import metrics
+from ..database import run_db
+
+router = APIRouter()
+
+
+@router.get("/inference-stats")
+async def inference_stats():
+    """Return micro-batching and query-cache statistics for the embedding model."""
+    return {"batches": batcher.stats(), "cache": embedding_cache.stats()}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the model is loaded and warmed up, else 503."""
+    is_ready, detail = readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "detail": detail},
+    )
+
+
+@router.get("/ingest-queue")
+async def ingest_queue():
+    """Return the depth of the asynchronous embedding queue."""
+    return await run_db(queue_depth)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms and counters in Prometheus text format."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -8,6 +8,34 @@ document.addEventListener('DOMContentLoaded', function() {
   console.log("Loading overlay found:", !!loadingOverlay);
   console.log("Loading text found:", !!loadingText);
 
+// Cursor of the next page of the feed; null once every item is shown
+let nextAfterId = null;
+
+function setNextPage(cursor) {
+  nextAfterId = cursor;
+  const loadMoreBtn = document.getElementById("loadMoreBtn");
+  if (loadMoreBtn) loadMoreBtn.classList.toggle("hidden", !cursor);
+}
+
+async function fetchPage(afterId) {
+  const params = new URLSearchParams({ slim: "true" });
+  if (afterId) params.set("after_id", afterId);
+  const res = await fetch(`/items?${params}`);
+  if (!res.ok) throw new Error(res.statusText);
+  return res.json();
+}
+
+// First page rendered by the server with the feed, if present
+function embeddedPage() {
+  const el = document.getElementById("items-data");
+  if (!el) return null;
+  try {
+    return JSON.parse(el.textContent);
+  } catch (error) {
+    return null;
+  }
+}
+
 async function loadItems() {
   const loadingOverlay = document.getElementById("loadingOverlay");
   const loadingText = document.getElementById("loadingText");
@@ -16,9 +44,9 @@ async function loadItems() {
     console.error("Loading overlay elements not found!");
     // Fallback without loading indicator
     try {
-      const res = await fetch("/items");
-      const data = await res.json();
-      renderItems(data);
+      const page = await fetchPage(null);
+      renderItems(page.items);
+      setNextPage(page.next_after_id);
     } catch (error) {
       console.error("Error loading items:", error);
     }
@@ -33,9 +61,9 @@ async function loadItems() {
   }
   
   try {
-    const res = await fetch("/items");
-    const data = await res.json();
-    renderItems(data);
+    const page = await fetchPage(null);
+    renderItems(page.items);
+    setNextPage(page.next_after_id);
   } catch (error) {
     console.error("Error loading items:", error);
     container.innerHTML = `
@@ -48,13 +76,24 @@ async function loadItems() {
   }
 }
 
-function renderItems(items) {
+async function loadMoreItems() {
+  if (!nextAfterId) return;
+  try {
+    const page = await fetchPage(nextAfterId);
+    renderItems(page.items, true);
+    setNextPage(page.next_after_id);
+  } catch (error) {
+    console.error("Error loading more items:", error);
+  }
+}
+
+function renderItems(items, append = false) {
   const container = document.getElementById("itemsContainer");
   const showScores = document.getElementById("showScores")?.checked || false;
   
-  container.innerHTML = "";
+  if (!append) container.innerHTML = "";
   
-  if (!items || items.length === 0) {
+  if (!append && (!items || items.length === 0)) {
     container.innerHTML = `
       <div class="col-span-full text-center py-12">
         <p class="text-gray-500 text-lg">No items found</p>
@@ -70,8 +109,14 @@ function renderItems(items) {
       : `<span class="inline-block bg-white text-green-600 px-2 py-1 rounded-full text-xs">FOUND</span>`;
     
     // Show similarity score if available and checkbox is checked
-    const similarityBadge = (showScores && i.similarity !== undefined) 
+    const similarityBadge = (showScores && i.similarity != null)
       ? `<span class="inline-block bg-yellow-100 text-yellow-800 px-2 py-1 rounded-full text-xs ml-2">Match: ${Math.round(i.similarity * 100)}%</span>`
+      : (showScores && i.keyword_score != null)
+        ? `<span class="inline-block bg-yellow-100 text-yellow-800 px-2 py-1 rounded-full text-xs ml-2">Keyword match</span>`
+        : '';
+    // Keyword search can return items that are not yet searchable by image
+    const pendingBadge = (i.embedding_status && i.embedding_status !== 'ready')
+      ? `<span class="inline-block bg-gray-100 text-gray-600 px-2 py-1 rounded-full text-xs ml-2">${i.embedding_status === 'failed' ? 'Not indexed' : 'Indexing…'}</span>`
       : '';
     
     const adminControls = isAdmin() ? `
@@ -80,13 +125,17 @@ function renderItems(items) {
           <button data-id="${i.id}" class="deleteBtn px-3 py-1 bg-red-500 text-sm text-white rounded">Delete</button>
         </div>` : '';
 
+    // Cards load the thumbnail rendition; older uploads without one fall back to the original
+    const imageSrc = i.image_path ? '/' + i.image_path.replace(/^\/?uploads\/?/, 'uploads/') : '';
+
     container.innerHTML += `
       <div class="bg-white rounded-lg shadow overflow-hidden hover:shadow-lg transition">
-        ${i.image_path ? `<img src="/${i.image_path.replace(/^\/?uploads\/?/, 'uploads/') }" class="w-full h-48 object-cover">` : ""}
+        ${imageSrc ? `<img src="${i.thumbnail_path || imageSrc}" data-original="${imageSrc}" loading="lazy" onerror="if (!this.dataset.fellBack) { this.dataset.fellBack = '1'; this.src = this.dataset.original; }" class="w-full h-48 object-cover">` : ""}
         <div class="p-4">
           <div class="flex items-center justify-between mb-2">
             ${badge}
             ${similarityBadge}
+            ${pendingBadge}
           </div>
           <h2 class="text-lg font-bold text-gray-800 mb-2">${i.title}</h2>
           <p class="text-sm text-gray-600 mb-3">${i.description}</p>
@@ -116,6 +165,8 @@ document.getElementById("searchBtn").addEventListener("click", async () => {
   const form = new FormData();
   if (text) form.append("description", text);
   if (image) form.append("image", image);
+  const mode = document.getElementById("searchMode");
+  if (mode) form.append("mode", mode.value);
 
   // Show loading overlay
   if (loadingOverlay && loadingText) {
@@ -139,6 +190,7 @@ document.getElementById("searchBtn").addEventListener("click", async () => {
       return;
     }
     
+    setNextPage(null);
     if (data.results && data.results.length > 0) {
       renderItems(data.results);
       searchInfo.classList.remove("hidden");
@@ -198,10 +250,9 @@ function isAdmin(){
 document.addEventListener('click', async (e) => {
   if(e.target.matches('.editBtn')){
     const id = e.target.getAttribute('data-id');
-    const res = await fetch('/items');
-    const items = await res.json();
-    const it = items.find(x=>String(x.id)===String(id));
-    if(!it) return alert('Item not found');
+    const res = await fetch(`/items/${id}`);
+    if(!res.ok) return alert('Item not found');
+    const it = await res.json();
     itemIdInput.value = it.id;
     document.getElementById('title').value = it.title || '';
     document.getElementById('description').value = it.description || '';
@@ -284,8 +335,16 @@ modal.addEventListener('click', (e) => {
   if (e.target === modal) hideModal();
 });
 
-// initial load
+document.getElementById("loadMoreBtn")?.addEventListener("click", loadMoreItems);
+
+// initial load: use the page rendered with the feed, else fetch it
 updateAuthLinks();
-loadItems();
+const firstPage = embeddedPage();
+if (firstPage) {
+  renderItems(firstPage.items);
+  setNextPage(firstPage.next_after_id);
+} else {
+  loadItems();
+}
 
 }); // End of DOMContentLoaded
@@ -0,0 +1,176 @@
+import math
+import numpy as np
+from ..config import (
+    VECTOR_INDEX,
+    IVF_NLIST,
+    IVF_NPROBE,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF,
+)
+
+
+class IVFIndex:
+    """Inverted-file index over normalized vectors, implemented in NumPy.
+
+    Vectors are clustered with spherical k-means; each item id is filed under
+    its nearest centroid. A query only visits the `nprobe` closest lists, so
+    raising `nprobe` trades latency for recall. Vectors themselves are not
+    copied: the caller rescores the returned candidate ids exactly.
+    """
+
+    def __init__(self, nlist: int = IVF_NLIST, nprobe: int = IVF_NPROBE, iterations: int = 10, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.trained_size = 0
+        self._lists = []
+        self._assignment = {}
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def empty(self):
+        """Return an untrained index with the same settings."""
+        return IVFIndex(self.nlist, self.nprobe, self.iterations, self.seed)
+
+    def build(self, ids, vectors):
+        """Train centroids on `vectors` and file every id under its list."""
+        n = len(ids)
+        if n == 0:
+            self.centroids = None
+            self.trained_size = 0
+            self._lists, self._assignment = [], {}
+            return
+        nlist = self.nlist or max(1, int(math.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+
+        # Train on a bounded sample; assignment below still covers every row
+        sample = vectors[rng.choice(n, size=min(n, nlist * 256), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if members.shape[0]:
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm > 0 else centroid
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = n
+
+        labels = np.argmax(vectors @ self.centroids.T, axis=1)
+        self._lists = [set() for _ in range(nlist)]
+        self._assignment = {}
+        for item_id, label in zip(ids, labels):
+            self._lists[label].add(int(item_id))
+            self._assignment[int(item_id)] = int(label)
+
+    def add(self, item_id, vector):
+        if not self.trained:
+            return
+        self.remove(item_id)
+        label = int(np.argmax(self.centroids @ vector))
+        self._lists[label].add(item_id)
+        self._assignment[item_id] = label
+
+    def remove(self, item_id):
+        label = self._assignment.pop(item_id, None)
+        if label is not None:
+            self._lists[label].discard(item_id)
+
+    def candidates(self, query, k):
+        """Return ids filed under the `nprobe` centroids closest to `query`."""
+        nprobe = min(self.nprobe, len(self._lists))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        ids = [item_id for probe in probes for item_id in self._lists[probe]]
+        return np.fromiter(ids, dtype=np.int64, count=len(ids))
+
+
+class HNSWIndex:
+    """HNSW graph backed by the optional `hnswlib` package.
+
+    `ef` is the search-time beam width: higher values raise recall at the
+    cost of latency.
+    """
+
+    def __init__(self, m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION, ef: int = HNSW_EF):
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise ImportError(
+                "VECTOR_INDEX=hnsw requires the optional 'hnswlib' package (pip install hnswlib)"
+            ) from exc
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self._index = None
+        self._deleted = set()
+        self.trained_size = 0
+
+    @property
+    def trained(self):
+        return self._index is not None
+
+    def empty(self):
+        """Return an untrained index with the same settings."""
+        return HNSWIndex(self.m, self.ef_construction, self.ef)
+
+    def _init(self, dim, capacity):
+        self._index = self._hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(
+            max_elements=max(capacity, 1024), ef_construction=self.ef_construction, M=self.m
+        )
+        self._index.set_ef(self.ef)
+        self._deleted = set()
+
+    def build(self, ids, vectors):
+        if len(ids) == 0:
+            self._index = None
+            self.trained_size = 0
+            return
+        self._init(vectors.shape[1], 2 * len(ids))
+        self._index.add_items(vectors, np.asarray(ids, dtype=np.int64))
+        self.trained_size = len(ids)
+
+    def add(self, item_id, vector):
+        if not self.trained:
+            return
+        if item_id in self._deleted:
+            self._index.unmark_deleted(item_id)
+            self._deleted.discard(item_id)
+        if self._index.get_current_count() >= self._index.get_max_elements():
+            self._index.resize_index(2 * self._index.get_max_elements())
+        self._index.add_items(vector.reshape(1, -1), np.asarray([item_id], dtype=np.int64))
+
+    def remove(self, item_id):
+        if self.trained and item_id not in self._deleted:
+            try:
+                self._index.mark_deleted(item_id)
+                self._deleted.add(item_id)
+            except RuntimeError:
+                pass
+
+    def candidates(self, query, k):
+        live = self._index.get_current_count() - len(self._deleted)
+        if live <= 0:
+            return np.zeros(0, dtype=np.int64)
+        self._index.set_ef(max(self.ef, k))
+        labels, _ = self._index.knn_query(query.reshape(1, -1), k=min(k, live))
+        return labels[0].astype(np.int64)
+
+
+def make_ann_index(kind: str = VECTOR_INDEX):
+    """Return the ANN backend selected by `kind`, or None for exact search."""
+    if kind == "exact":
+        return None
+    if kind == "ivf":
+        return IVFIndex()
+    if kind == "hnsw":
+        return HNSWIndex()
+    raise ValueError(f"Unknown VECTOR_INDEX setting: {kind}")
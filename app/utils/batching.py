@@ -0,0 +1,79 @@
+import asyncio
+from collections import Counter
+
+
+class MicroBatcher:
+    """Coalesce concurrent encode requests into batched model calls.
+
+    Requests are queued per modality ("text" / "image") and model. A queue
+    is flushed once it holds `max_batch_size` items or `max_wait_ms` after
+    its first item arrived, whichever comes first. The batch is handed to
+    `encode_fn(kind, payloads, model)` through the async `runner` and each
+    caller receives its own row of the result.
+    """
+
+    def __init__(self, runner, encode_fn, max_batch_size: int, max_wait_ms: float):
+        self._runner = runner
+        self._encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = {}
+        self._timers = {}
+        # Strong references so running batches are not garbage collected
+        self._tasks = set()
+        self.histograms = {}
+
+    async def submit(self, kind, payload, model=None):
+        """Queue one payload and wait for its embedding."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (kind, model)
+        pending = self._pending.setdefault(key, [])
+        pending.append((payload, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        self.histograms.setdefault(key[0], Counter())[len(batch)] += 1
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        kind, model = key
+        try:
+            results = await self._runner(self._encode_fn, kind, [p for p, _ in batch], model)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        """Return batch counts and batch-size histograms per modality."""
+        return {
+            kind: {
+                "batches": sum(hist.values()),
+                "items": sum(size * count for size, count in hist.items()),
+                "histogram": dict(sorted(hist.items())),
+            }
+            for kind, hist in self.histograms.items()
+        }
@@ -0,0 +1,177 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from pathlib import Path
+from ..config import ALLOWED_EXTENSIONS, BULK_BATCH_SIZE
+from ..database import run_db
+from .embedding_codec import pack_embedding
+from .image_store import register_image
+from .image_utils import write_image_bytes
+from .matches import update_matches
+from .inference import encode_many
+from .model_versions import get_active_model, index_embedding, item_write
+from .vector_index import item_state
+
+REQUIRED_FIELDS = ("title", "description", "category", "location", "phone")
+VALID_STATUSES = {"Yet to be found", "Lost", "Found", "Resolved"}
+
+
+def iter_manifest(stream, fmt: str):
+    """Yield (line number, row) pairs from a binary CSV or JSONL stream.
+
+    Rows are dicts, except that a JSONL line that does not parse yields a
+    ValueError in its place, so one bad line does not end the import
+    (`_validate` reports it).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, ValueError(f"invalid JSON: {getattr(exc, 'msg', exc)}")
+    else:
+        raise ValueError(f"Unsupported manifest format: {fmt}")
+
+
+def manifest_format(filename: str) -> str:
+    """Infer the manifest format from its file extension."""
+    suffix = Path(filename or "").suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError("Manifest must be a .csv or .jsonl file")
+
+
+def _validate(row):
+    if isinstance(row, ValueError):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object, got {type(row).__name__}")
+    missing = [f for f in REQUIRED_FIELDS if not str(row.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    status = row.get("status") or "Yet to be found"
+    if not isinstance(status, str) or status not in VALID_STATUSES:
+        raise ValueError(f"invalid status {status!r}")
+    image = row.get("image") or None
+    if image and (not isinstance(image, str) or Path(image).suffix.lower() not in ALLOWED_EXTENSIONS):
+        raise ValueError(f"unsupported image type {image!r}")
+    return status, image
+
+
+async def _import_batch(batch, load_image, report):
+    """Encode one batch with two model calls and insert it in one transaction."""
+    from .embeddings import build_text, combine_embeddings
+
+    model_name = get_active_model()
+    texts = [build_text(row["description"], row["title"]) for _, row, _, _ in batch]
+    images = {}
+    for pos, (line, row, _, image) in enumerate(batch):
+        if image:
+            try:
+                images[pos] = load_image(image)
+            except KeyError:
+                report["warnings"].append({"line": line, "error": f"image {image!r} was not uploaded"})
+            except OSError as exc:
+                report["warnings"].append({"line": line, "error": f"image {image!r}: {exc}"})
+
+    text_embeddings = await encode_many("text", texts, model_name)
+    image_embeddings = dict(
+        zip(images, await encode_many("image", [io.BytesIO(b) for b in images.values()], model_name))
+    ) if images else {}
+
+    # Files and renditions are written off the event loop before the
+    # transaction, which then only inserts rows
+    to_store = [pos for pos, emb in image_embeddings.items() if not isinstance(emb, Exception)]
+    files = await asyncio.gather(
+        *(asyncio.to_thread(write_image_bytes, batch[pos][3], images[pos]) for pos in to_store)
+    )
+    stored = dict(zip(to_store, files))
+
+    def insert(conn):
+        inserted = []
+        for pos, (line, row, status, image) in enumerate(batch):
+            parts = [text_embeddings[pos]]
+            image_path = None
+            image_emb = image_embeddings.get(pos)
+            if isinstance(image_emb, Exception):
+                report["warnings"].append({"line": line, "error": str(image_emb)})
+            elif image_emb is not None:
+                parts.append(image_emb)
+                image_path, sha256, phash = stored[pos]
+                register_image(conn, image_path, sha256, phash)
+            embedding = combine_embeddings(parts)
+            blob, dim, dtype = pack_embedding(embedding)
+            cursor = conn.execute(
+                "INSERT INTO items (title, description, category, location, phone, image_path, embedding, embedding_dim, embedding_dtype, embedding_model, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    row["title"],
+                    row["description"],
+                    row["category"],
+                    row["location"],
+                    row["phone"],
+                    image_path,
+                    blob,
+                    dim,
+                    dtype,
+                    model_name,
+                    status,
+                ),
+            )
+            inserted.append((cursor.lastrowid, embedding, item_state(conn, cursor.lastrowid)))
+        conn.commit()
+        return inserted
+
+    inserted = await run_db(insert)
+    for item_id, embedding, state in inserted:
+        index_embedding(item_id, embedding, model_name, state)
+    await update_matches([(item_id, embedding) for item_id, embedding, _ in inserted], model_name)
+    report["imported"] += len(inserted)
+
+
+async def import_items(rows, load_image, batch_size: int = BULK_BATCH_SIZE, progress=None):
+    """Import manifest `rows`, encoding and inserting them `batch_size` at a time.
+
+    `rows` yields (line number, row) pairs as from `iter_manifest` and
+    `load_image(name)` returns the bytes of an image referenced by a row.
+    Invalid or unparsable rows are skipped and listed under "errors"; rows whose image
+    cannot be read are imported text-only and listed under "warnings". The
+    result includes throughput in items per second.
+    """
+    report = {"imported": 0, "failed": 0, "errors": [], "warnings": []}
+    start = time.perf_counter()
+    batch = []
+    for line, row in rows:
+        try:
+            status, image = _validate(row)
+        except ValueError as exc:
+            report["errors"].append({"line": line, "error": str(exc)})
+            continue
+        batch.append((line, row, status, image))
+        if len(batch) >= batch_size:
+            async with item_write():
+                await _import_batch(batch, load_image, report)
+            batch = []
+            if progress:
+                progress(report)
+    if batch:
+        async with item_write():
+            await _import_batch(batch, load_image, report)
+        if progress:
+            progress(report)
+
+    seconds = time.perf_counter() - start
+    report["failed"] = len(report["errors"])
+    report["seconds"] = round(seconds, 3)
+    report["items_per_second"] = round(report["imported"] / seconds, 2) if seconds else 0.0
+    return report
@@ -0,0 +1,107 @@
+import hashlib
+import mmap
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from ..config import EMBED_CACHE_ENTRIES, EMBED_CACHE_BYTES, EMBED_CACHE_TTL
+
+
+def text_key(text: str) -> str:
+    """Normalize a query string for cache lookup.
+
+    CLIP's tokenizer lowercases and collapses whitespace itself, so this does
+    not merge queries the model would embed differently.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def image_key(image_data) -> str:
+    """Return a SHA-256 digest of an image buffer's bytes."""
+    if hasattr(image_data, "getbuffer"):
+        return hashlib.sha256(image_data.getbuffer()).hexdigest()
+    if isinstance(image_data, mmap.mmap):
+        # Hashes the mapped pages in place instead of copying the file
+        return hashlib.sha256(image_data).hexdigest()
+    position = image_data.tell()
+    digest = hashlib.sha256(image_data.read()).hexdigest()
+    image_data.seek(position)
+    return digest
+
+
+def _nbytes(embedding):
+    return getattr(embedding, "nbytes", 0)
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of embeddings with an optional TTL.
+
+    Entries are keyed by (model name, modality, key), so vectors from one
+    model are never served for another and a model switch (or a staged
+    model warming up next to the active one) does not flush the cache;
+    entries of a model no longer queried age out through the LRU.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_name, kind, key):
+        cache_key = (model_name, kind, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and self.ttl and time.monotonic() - entry[1] > self.ttl:
+                self._pop(cache_key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, model_name, kind, key, embedding):
+        if self.max_entries <= 0:
+            return
+        cache_key = (model_name, kind, key)
+        with self._lock:
+            self._pop(cache_key)
+            self._entries[cache_key] = (embedding, time.monotonic())
+            self._bytes += _nbytes(embedding)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= _nbytes(entry[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            models = Counter(model_name for model_name, _, _ in self._entries)
+        return {
+            "models": dict(models),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+embedding_cache = EmbeddingCache(EMBED_CACHE_ENTRIES, EMBED_CACHE_BYTES, EMBED_CACHE_TTL)
@@ -0,0 +1,34 @@
+import json
+import numpy as np
+from ..config import EMBEDDING_DTYPE
+
+# Little-endian on-disk formats for the items.embedding BLOB
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+
+def pack_embedding(embedding, dtype: str = EMBEDDING_DTYPE) -> tuple[bytes, int, str]:
+    """Serialize an embedding to (blob, dim, dtype) for storage in SQLite.
+
+    Accepts a torch tensor, NumPy array or plain list.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    if hasattr(embedding, "detach"):
+        embedding = embedding.detach().cpu().numpy()
+    array = np.asarray(embedding, dtype=DTYPES[dtype]).reshape(-1)
+    return array.tobytes(), int(array.shape[0]), dtype
+
+
+def unpack_embedding(blob, dim: int | None = None, dtype: str | None = None) -> np.ndarray:
+    """Decode a stored embedding into a read-only NumPy view.
+
+    BLOBs are wrapped with `np.frombuffer` without copying (use
+    `torch.from_numpy` for a tensor view). Rows still holding the legacy JSON
+    text encoding are parsed so unmigrated databases keep working.
+    """
+    if isinstance(blob, str):
+        return np.asarray(json.loads(blob), dtype=np.float32)
+    array = np.frombuffer(blob, dtype=DTYPES[dtype or "float32"])
+    if dim is not None and array.shape[0] != dim:
+        raise ValueError(f"Stored embedding has {array.shape[0]} values, expected {dim}")
+    return array
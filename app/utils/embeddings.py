@@ -1,46 +1,164 @@
-import io
+import threading
 import torch
 from PIL import Image
-from sentence_transformers import SentenceTransformer
+from ..config import (
+    MODEL_NAME,
+    MODEL_IMAGE_SIZE,
+    TORCH_NUM_THREADS,
+    INFERENCE_BACKEND,
+    ONNX_QUANTIZED,
+)
+from .image_utils import open_downscaled
+from .metrics import metrics
 
+_models = {}
+_model_lock = threading.Lock()
 
-# Using larger, more accurate CLIP model for better image matching across different angles
-model = SentenceTransformer("clip-ViT-L-14")
 
+def load_model(name, backend=INFERENCE_BACKEND, quantized=ONNX_QUANTIZED):
+    """Load the CLIP model `name` on the given inference backend.
 
-def get_embedding(text=None, image_data=None, title=None):
+    `quantized` selects the int8 or fp32 export on the ONNX backend.
+    """
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        if TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(TORCH_NUM_THREADS)
+        return SentenceTransformer(name)
+    if backend == "onnx":
+        from .onnx_backend import OnnxClipModel, export_dir
+
+        return OnnxClipModel(export_dir(name), quantized=quantized)
+    raise ValueError(f"Unknown INFERENCE_BACKEND setting: {backend}")
+
+
+def get_model(name=None):
+    """Return the CLIP model `name` (default MODEL_NAME), loading it on first use.
+
+    Loading is deferred so importing the app, the auth routes or the
+    maintenance scripts does not pay for it. Several models can be loaded
+    at once while a new embedding model is rolled out. INFERENCE_BACKEND
+    selects sentence-transformers or the ONNX Runtime export.
+    """
+    name = name or MODEL_NAME
+    model = _models.get(name)
+    if model is None:
+        with _model_lock:
+            model = _models.get(name)
+            if model is None:
+                model = load_model(name)
+                _models[name] = model
+    return model
+
+
+def is_model_loaded(name=None):
+    return (name or MODEL_NAME) in _models
+
+
+def warm_up(name=None):
+    """Load the model and run one text and one image encode through it."""
+    model = get_model(name)
+    model.encode("warm-up", convert_to_tensor=True, normalize_embeddings=True)
+    model.encode(Image.new("RGB", (224, 224)), convert_to_tensor=True, normalize_embeddings=True)
+
+
+def build_text(text=None, title=None):
+    """Combine title and description into the text that gets embedded."""
+    # Combine title and text for better text matching-
+    if title and text:
+        return f"{title}. {text}"
+    if title and not text:
+        return title
+    return text
+
+
+def combine_embeddings(embeddings):
+    """Average a text and an image embedding, or pass a single one through.
+
+    NumPy parts (image embeddings reused from the image store) are moved
+    to the device of the freshly encoded ones.
+    """
+    device = next((e.device for e in embeddings if isinstance(e, torch.Tensor)), "cpu")
+    embeddings = [torch.as_tensor(e, device=device) for e in embeddings]
+    return (
+        torch.mean(torch.stack(embeddings), dim=0)
+        if len(embeddings) == 2
+        else embeddings[0]
+    )
+
+
+def _model_encode(model, kind, payload, items=1):
+    """Run one model.encode call, counted and timed per modality."""
+    metrics.count("model_calls_total", kind=kind)
+    metrics.count("model_items_total", items, kind=kind)
+    with metrics.timer("model_seconds", kind=kind):
+        return model.encode(payload, convert_to_tensor=True, normalize_embeddings=True)
+
+
+def decode_image(image_data):
+    """Decode an image buffer or path into an RGB PIL image.
+
+    Large photos are decoded straight to about the model's input size
+    (see `open_downscaled`); CLIP would resize them to that anyway.
+    """
+    return open_downscaled(image_data, MODEL_IMAGE_SIZE)
+
+
+def encode_batch(kind, payloads, model_name=None):
+    """Encode a batch of texts or images with one model call.
+
+    Images may be buffers or already-decoded PIL images. Returns one
+    embedding per payload, in order. Images that fail to decode yield the
+    exception instead, so one bad upload does not fail its batch.
+    """
+    model = get_model(model_name)
+    if kind == "text":
+        return list(_model_encode(model, "text", list(payloads), len(payloads)))
+
+    results = [None] * len(payloads)
+    images, positions = [], []
+    for i, image_data in enumerate(payloads):
+        try:
+            if isinstance(image_data, Image.Image):
+                images.append(image_data)
+            else:
+                with metrics.stage("embed.decode_image"):
+                    images.append(decode_image(image_data))
+            positions.append(i)
+        except Exception as exc:
+            results[i] = ValueError(f"Invalid image: {exc}")
+    if images:
+        encoded = _model_encode(model, "image", images, len(images))
+        for i, emb in zip(positions, encoded):
+            results[i] = emb
+    return results
+
+
+@metrics.timed("get_embedding")
+def get_embedding(text=None, image_data=None, title=None, model_name=None):
     """Return a CLIP embedding for text, image, or both.
-    
+
     Args:
         text: Description text
         image_data: Image bytes
         title: Item title (will be prepended to text if provided)
+        model_name: Model to use (default MODEL_NAME)
     """
-    # Combine title and text for better text matching-
-    if title and text:
-        text = f"{title}. {text}"
-    elif title and not text:
-        text = title
-    
+    text = build_text(text, title)
+
     if text is None and image_data is None:
         raise ValueError("Provide text or image")
 
+    model = get_model(model_name)
     embeddings = []
 
     if text:
-        embeddings.append(
-            model.encode(text, convert_to_tensor=True, normalize_embeddings=True)
-        )
+        embeddings.append(_model_encode(model, "text", text))
 
     if image_data:
-        image = Image.open(image_data).convert("RGB")
-        embeddings.append(
-            model.encode(image, convert_to_tensor=True, normalize_embeddings=True)
-        )
-
-    return (
-        torch.mean(torch.stack(embeddings), dim=0)
-        if len(embeddings) == 2
-        else embeddings[0]
-    )
+        with metrics.stage("embed.decode_image"):
+            image = decode_image(image_data)
+        embeddings.append(_model_encode(model, "image", image))
 
+    return combine_embeddings(embeddings)
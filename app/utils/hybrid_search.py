@@ -0,0 +1,57 @@
+import re
+from ..config import RRF_K
+
+# bm25() weights per items_fts column: title, description, category, location
+BM25_WEIGHTS = (4.0, 1.0, 1.0, 2.0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str):
+    """Turn free text into an FTS5 query that matches any of its tokens.
+
+    Tokens are quoted so user input never reaches the FTS5 query syntax
+    (`-`, `:`, `AND`, ...); BM25 ranks items matching more and rarer
+    tokens first. Returns None when the text has no searchable tokens.
+    """
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " OR ".join(f'"{token}"' for token in dict.fromkeys(t.lower() for t in tokens))
+
+
+def keyword_search(conn, text: str, condition=None, params=(), limit: int = 50):
+    """Return (item_id, bm25 score) pairs for `text`, best first.
+
+    Scores are negated BM25, so higher is better. `condition` and
+    `params` are the search filters, applied to items inside the query.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    sql = f"SELECT rowid, -bm25(items_fts, {weights}) AS score FROM items_fts WHERE items_fts MATCH ?"
+    args = [query]
+    if condition:
+        # Unary + keeps SQLite from pushing the IN list into FTS5 as rowid
+        # lookups, which would re-run the MATCH once per allowed item
+        sql += f" AND +rowid IN (SELECT id FROM items WHERE {condition})"
+        args.extend(params)
+    sql += " ORDER BY score DESC LIMIT ?"
+    args.append(limit)
+    return [(row[0], row[1]) for row in conn.execute(sql, args)]
+
+
+def fuse_rankings(*rankings, k: int = RRF_K):
+    """Reciprocal rank fusion of ranked (item_id, score) lists.
+
+    Each list contributes 1 / (k + rank) for every item it contains, so an
+    item ranked well by both keyword and vector search beats one that only
+    a single ranking likes, without having to calibrate BM25 against
+    cosine similarity. Returns (item_id, fused score) pairs, best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (item_id, _) in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda hit: -hit[1])
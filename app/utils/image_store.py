@@ -0,0 +1,209 @@
+import hashlib
+import io
+import numpy as np
+from PIL import Image
+from ..config import PHASH_MAX_DISTANCE
+from .embedding_codec import pack_embedding, unpack_embedding
+from .image_utils import open_downscaled, rendition_url
+
+# The 64-bit difference hash is indexed as four 16-bit bands: two hashes
+# within 3 bits of each other agree exactly on at least one band
+BANDS = 4
+_MASK = (1 << 64) - 1
+
+
+def difference_hash(image: Image.Image) -> int:
+    """Return the 64-bit dHash of an image.
+
+    Each bit says whether a pixel of a 9x8 grayscale thumbnail is brighter
+    than its right neighbour, so re-encoding, resizing or small colour
+    shifts of the same photo flip only a few bits.
+    """
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).reshape(-1)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def perceptual_hash(source):
+    """dHash of an image buffer or path, or None when it cannot be decoded."""
+    try:
+        return difference_hash(open_downscaled(source, 32))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def image_fingerprint(content: bytes) -> tuple[str, int | None]:
+    """Return the SHA-256 hex digest and dHash of an image's bytes."""
+    return hashlib.sha256(content).hexdigest(), perceptual_hash(io.BytesIO(content))
+
+
+def _to_sql(phash):
+    # SQLite integers are signed 64-bit
+    return phash - (1 << 64) if phash >= 1 << 63 else phash
+
+
+def _bands(phash):
+    return [(phash >> (16 * i)) & 0xFFFF for i in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def find_image(conn, sha256: str):
+    """Return the stored filename of an image with these exact bytes, if any."""
+    row = conn.execute(
+        "SELECT image_path FROM images WHERE sha256 = ? ORDER BY created_at LIMIT 1", (sha256,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def register_image(conn, image_path: str, sha256: str, phash):
+    """Record a stored file with its content and perceptual hashes (caller commits)."""
+    bands = _bands(phash) if phash is not None else [None] * BANDS
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO images (image_path, sha256, phash, phash_band0, phash_band1, phash_band2, phash_band3)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (image_path, sha256, _to_sql(phash) if phash is not None else None, *bands),
+    )
+
+
+def release_image(conn, image_path: str) -> bool:
+    """Forget a file no item references any more; True if the caller should delete it.
+
+    Identical uploads share one file, so it is only removed with its last item.
+    """
+    if conn.execute("SELECT 1 FROM items WHERE image_path = ? LIMIT 1", (image_path,)).fetchone():
+        return False
+    conn.execute("DELETE FROM images WHERE image_path = ?", (image_path,))
+    return True
+
+
+def similar_images(conn, phash: int, max_distance: int = PHASH_MAX_DISTANCE):
+    """Return (image_path, sha256, distance) of images within `max_distance` bits, closest first.
+
+    Candidates come from the band indexes, so this never scans the table;
+    distances above 3 bits are only found when they also share a band.
+    """
+    bands = _bands(phash)
+    rows = conn.execute(
+        """
+        SELECT image_path, sha256, phash FROM images
+        WHERE phash_band0 = ? OR phash_band1 = ? OR phash_band2 = ? OR phash_band3 = ?
+        """,
+        bands,
+    ).fetchall()
+    matches = [(path, sha, hamming(phash, other)) for path, sha, other in rows]
+    return sorted((m for m in matches if m[2] <= max_distance), key=lambda m: m[2])
+
+
+def _stored_embedding(conn, sha256, model_name):
+    return conn.execute(
+        "SELECT embedding, embedding_dim, embedding_dtype FROM image_embeddings WHERE sha256 = ? AND model_name = ?",
+        (sha256, model_name),
+    ).fetchone()
+
+
+def load_image_embedding(conn, sha256: str, model_name: str):
+    """Return a cached image embedding for these bytes or a near-identical image.
+
+    Looks up the exact content hash first. If the bytes are a registered
+    upload without an embedding yet, the closest stored image within
+    PHASH_MAX_DISTANCE bits that has one is used instead. Returns a NumPy
+    array, or None when CLIP has to run.
+    """
+    row = _stored_embedding(conn, sha256, model_name)
+    if row is None and PHASH_MAX_DISTANCE > 0:
+        image = conn.execute(
+            "SELECT phash FROM images WHERE sha256 = ? AND phash IS NOT NULL LIMIT 1", (sha256,)
+        ).fetchone()
+        if image:
+            for _, other, _ in similar_images(conn, image[0] & _MASK):
+                if other != sha256:
+                    row = _stored_embedding(conn, other, model_name)
+                    if row:
+                        break
+    if row is None:
+        return None
+    return np.array(unpack_embedding(row[0], row[1], row[2]), dtype=np.float32)
+
+
+def save_image_embedding(conn, sha256: str, model_name: str, embedding):
+    """Keep the image embedding of a stored upload for later re-uploads.
+
+    Query images from /search are not registered in `images`, so they are
+    skipped without taking the write lock.
+    """
+    if not conn.execute("SELECT 1 FROM images WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+        return
+    blob, dim, dtype = pack_embedding(embedding)
+    conn.execute(
+        "INSERT OR IGNORE INTO image_embeddings (sha256, model_name, embedding, embedding_dim, embedding_dtype) VALUES (?, ?, ?, ?, ?)",
+        (sha256, model_name, blob, dim, dtype),
+    )
+    conn.commit()
+
+
+def duplicate_groups(conn, max_distance: int = PHASH_MAX_DISTANCE):
+    """Group items whose images are identical or within `max_distance` bits.
+
+    Returns groups of two or more items, largest first. `exact` is True
+    when every item in the group shares the same bytes.
+    """
+    rows = conn.execute(
+        """
+        SELECT i.id, i.title, i.category, i.status, i.image_path, g.sha256, g.phash
+        FROM items i JOIN images g ON g.image_path = i.image_path
+        ORDER BY i.id
+        """
+    ).fetchall()
+
+    parent = {}
+
+    def find(key):
+        while parent.setdefault(key, key) != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    # Union content hashes whose perceptual hashes are close, via the bands
+    phashes = {r["sha256"]: r["phash"] & _MASK for r in rows if r["phash"] is not None}
+    buckets = {}
+    for sha, phash in phashes.items():
+        for band, value in enumerate(_bands(phash)):
+            buckets.setdefault((band, value), []).append(sha)
+    for members in buckets.values():
+        for i, sha in enumerate(members):
+            for other in members[i + 1:]:
+                if hamming(phashes[sha], phashes[other]) <= max_distance:
+                    parent[find(sha)] = find(other)
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(find(row["sha256"]), []).append(row)
+
+    report = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        shas = {m["sha256"] for m in members}
+        report.append(
+            {
+                "exact": len(shas) == 1,
+                "items": [
+                    {
+                        "id": m["id"],
+                        "title": m["title"],
+                        "category": m["category"],
+                        "status": m["status"],
+                        "image_path": m["image_path"],
+                        "thumbnail_path": rendition_url(m["image_path"], "thumbs"),
+                    }
+                    for m in members
+                ],
+            }
+        )
+    report.sort(key=lambda g: -len(g["items"]))
+    return report
@@ -1,12 +1,38 @@
+import glob
+import hashlib
 import io
-import time
+import mmap
+import uuid
+import numpy as np
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
-from ..config import UPLOAD_DIR, ALLOWED_EXTENSIONS
+from PIL import Image, ImageOps
+from ..config import (
+    UPLOAD_DIR,
+    ALLOWED_EXTENSIONS,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_CHUNK_SIZE,
+    MODEL_IMAGE_SIZE,
+    THUMBNAIL_SIZE,
+    MEDIUM_SIZE,
+    RENDITION_QUALITY,
+    PREPROCESS_CACHE_DIR,
+)
+from .metrics import metrics
 
+# Rendition name -> longest side in pixels; stored as uploads/<name>/<file>.jpg
+RENDITIONS = {"thumbs": THUMBNAIL_SIZE, "medium": MEDIUM_SIZE}
 
-def save_image(image: UploadFile) -> tuple[str, io.BytesIO]:
-    """Persist an uploaded image and return its path and bytes buffer."""
+# Leading bytes of the accepted formats and the extension they are stored
+# under; the uploaded filename's extension alone is not trusted
+IMAGE_SIGNATURES = {b"\xff\xd8\xff": ".jpg", b"\x89PNG\r\n\x1a\n": ".png"}
+
+
+def _sniff_extension(head: bytes):
+    return next((ext for sig, ext in IMAGE_SIGNATURES.items() if head.startswith(sig)), None)
+
+
+def _check_upload(image: UploadFile):
     if not image or not image.filename:
         raise HTTPException(status_code=400, detail="No image file provided")
 
@@ -14,20 +40,229 @@ def save_image(image: UploadFile) -> tuple[str, io.BytesIO]:
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    filename = f"{int(time.time())}_{Path(image.filename).name}"
-    save_path = Path(UPLOAD_DIR) / filename
-    save_path.parent.mkdir(parents=True, exist_ok=True)
 
-    content = image.file.read()
-    if not content:
+def _iter_chunks(image: UploadFile, max_bytes: int):
+    """Yield an upload in UPLOAD_CHUNK_SIZE pieces, validating it on the way.
+
+    The first chunk must start with a known image signature and the total
+    may not exceed `max_bytes`; either check fails before the rest is read.
+    """
+    image.file.seek(0)
+    total = 0
+    while chunk := image.file.read(UPLOAD_CHUNK_SIZE):
+        if total == 0 and not _sniff_extension(chunk):
+            raise HTTPException(status_code=400, detail="File is not a JPEG or PNG image")
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"Image exceeds the {max_bytes // 1024} KB upload limit"
+            )
+        yield chunk
+    if total == 0:
         raise HTTPException(status_code=400, detail="Empty file uploaded")
+    metrics.observe("upload_bytes", total)
+
+
+def read_upload(image: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> io.BytesIO:
+    """Read a validated upload that is not stored (e.g. a search query) into one buffer."""
+    _check_upload(image)
+    buffer = io.BytesIO()
+    for chunk in _iter_chunks(image, max_bytes):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def map_image(path) -> mmap.mmap:
+    """Map a stored image read-only, as a file-like buffer for the embedder.
+
+    The pages come from the OS page cache, so concurrent uploads do not each
+    hold a private copy of the file in memory.
+    """
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    with open(save_path, "wb") as f:
-        f.write(content)
 
-    with open(save_path, "rb") as img_file:
-        image_data = io.BytesIO(img_file.read())
+@metrics.timed("save_image")
+def save_image(image: UploadFile) -> tuple[str, mmap.mmap, tuple[str, int | None]]:
+    """Stream an uploaded image to content-addressed storage.
+
+    The upload is copied chunk by chunk into a temporary file while its
+    SHA-256 is computed, so memory use does not grow with the file size
+    and a rejected upload leaves nothing behind. The file is stored as
+    `<sha256>.<ext>`; if the same bytes are already stored (also under a
+    pre-hashing name) that file is reused. Returns the filename, a mapped
+    buffer for the embedder and the (sha256, phash) fingerprint, which the
+    caller registers with `register_image` in the transaction that stores
+    the item, so a failed upload leaves no `images` row behind.
+    """
+    # image_store builds on the helpers in this module
+    from ..database import connection
+    from .image_store import find_image, perceptual_hash
+
+    _check_upload(image)
+
+    upload_dir = Path(UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    part_path = upload_dir / f".{uuid.uuid4().hex}.part"
+    digest, ext = hashlib.sha256(), None
+    try:
+        with open(part_path, "wb") as f, metrics.stage("save_image.write"):
+            for chunk in _iter_chunks(image, MAX_UPLOAD_BYTES):
+                ext = ext or _sniff_extension(chunk)
+                digest.update(chunk)
+                f.write(chunk)
+        sha256 = digest.hexdigest()
+
+        with connection() as conn:
+            filename = find_image(conn, sha256)
+        if not filename or not (upload_dir / filename).exists():
+            filename = f"{sha256}{ext}"
+            if not (upload_dir / filename).exists():
+                part_path.replace(upload_dir / filename)
+    finally:
+        part_path.unlink(missing_ok=True)
+
+    image_data = map_image(upload_dir / filename)
+    if not all(rendition_path(filename, kind).exists() for kind in RENDITIONS):
+        with metrics.stage("save_image.renditions"):
+            make_renditions(filename, image_data)
+    with metrics.stage("save_image.phash"):
+        phash = perceptual_hash(image_data)
+        image_data.seek(0)
 
     # Return only filename (not full path) for storage in database
-    return filename, image_data
+    return filename, image_data, (sha256, phash)
+
+
+def write_image_bytes(name: str, content: bytes, conn=None) -> tuple[str, str, int | None]:
+    """Store image bytes and their renditions like `save_image`, without registering them.
+
+    Existing files are looked up on `conn` (a pooled connection if None).
+    Returns (filename, sha256, phash) for `register_image`.
+    """
+    from ..database import connection
+    from .image_store import find_image, image_fingerprint
+
+    sha256, phash = image_fingerprint(content)
+    if conn is None:
+        with connection() as pooled:
+            filename = find_image(pooled, sha256)
+    else:
+        filename = find_image(conn, sha256)
+    if not filename or not (Path(UPLOAD_DIR) / filename).exists():
+        filename = f"{sha256}{_sniff_extension(content) or Path(name).suffix.lower()}"
+        save_path = Path(UPLOAD_DIR) / filename
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        if not save_path.exists():
+            with open(save_path, "wb") as f:
+                f.write(content)
+            make_renditions(filename, io.BytesIO(content))
+    return filename, sha256, phash
+
+
+def store_image_bytes(name: str, content: bytes, conn) -> str:
+    """Store image bytes like `save_image` and register them on `conn` (caller commits)."""
+    from .image_store import register_image
+
+    filename, sha256, phash = write_image_bytes(name, content, conn)
+    register_image(conn, filename, sha256, phash)
+    return filename
+
+
+def open_downscaled(source, min_side: int = MODEL_IMAGE_SIZE) -> Image.Image:
+    """Decode an image buffer or path to RGB with its short side close to `min_side`.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale by 1/2, 1/4
+    or 1/8 while decoding, so a 12 MP photo never materializes at full
+    size. Other formats are shrunk by an integer factor with `reduce`.
+    The short side never ends up below `min_side`.
+    """
+    image = Image.open(source)
+    if image.format == "JPEG":
+        image.draft("RGB", (min_side, min_side))
+    factor = min(image.size) // min_side
+    if factor >= 2:
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        image = image.reduce(factor)
+    return image.convert("RGB")
+
+
+def rendition_path(filename: str, kind: str) -> Path:
+    return Path(UPLOAD_DIR) / kind / f"{Path(filename).name}.jpg"
+
+
+def rendition_url(filename, kind: str):
+    """URL of an image's `kind` rendition under /uploads, or None without an image."""
+    if not filename:
+        return None
+    name = Path(str(filename)).name
+    return f"/uploads/{kind}/{name}.jpg"
+
+
+def make_renditions(filename: str, source=None) -> bool:
+    """Write the thumbnail and medium JPEG renditions of a stored upload.
+
+    Decodes the original once (from `source` when the caller already holds
+    its bytes), reduced towards the largest rendition, then shrinks it step
+    by step. Returns False when the file cannot be decoded; list views fall
+    back to the original then.
+    """
+    if source is None:
+        source = Path(UPLOAD_DIR) / filename
+    try:
+        with Image.open(source) as original:
+            if original.format == "JPEG":
+                original.draft("RGB", (MEDIUM_SIZE, MEDIUM_SIZE))
+            image = ImageOps.exif_transpose(original).convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return False
+
+    for kind, size in sorted(RENDITIONS.items(), key=lambda r: -r[1]):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        target = rendition_path(filename, kind)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        image.save(target, "JPEG", quality=RENDITION_QUALITY, optimize=True, progressive=True)
+    return True
+
+
+def delete_image(filename: str):
+    """Remove a stored upload with its renditions and preprocessed cache entries."""
+    Path(UPLOAD_DIR, filename).unlink(missing_ok=True)
+    for kind in RENDITIONS:
+        rendition_path(filename, kind).unlink(missing_ok=True)
+    for cached in Path(PREPROCESS_CACHE_DIR).glob(f"{glob.escape(Path(filename).name)}.*.npy"):
+        cached.unlink(missing_ok=True)
+
+
+def center_crop(image: Image.Image, size: int = MODEL_IMAGE_SIZE) -> Image.Image:
+    """Resize the short side to `size` and crop the centre square, like CLIP's preprocessing."""
+    scale = size / min(image.size)
+    width, height = max(size, round(image.width * scale)), max(size, round(image.height * scale))
+    image = image.resize((width, height), Image.Resampling.BICUBIC)
+    left, top = (width - size) // 2, (height - size) // 2
+    return image.crop((left, top, left + size, top + size))
+
+
+def load_preprocessed(path: Path, size: int = MODEL_IMAGE_SIZE) -> Image.Image:
+    """Return `path` as a model-sized RGB crop, cached on disk between runs.
+
+    The cache key includes the file's size and modification time, so a
+    replaced image is decoded again. The crop is what CLIP would feed the
+    network anyway, so re-embedding from the cache gives the same input.
+    """
+    stat = path.stat()
+    cache_file = Path(PREPROCESS_CACHE_DIR) / f"{path.name}.{size}-{stat.st_size}-{int(stat.st_mtime)}.npy"
+    if cache_file.exists():
+        try:
+            return Image.fromarray(np.load(cache_file))
+        except (OSError, ValueError):
+            pass
 
+    image = center_crop(open_downscaled(path, size), size)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    for stale in cache_file.parent.glob(f"{glob.escape(path.name)}.{size}-*.npy"):
+        stale.unlink(missing_ok=True)
+    np.save(cache_file, np.asarray(image, dtype=np.uint8))
+    return image
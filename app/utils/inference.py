@@ -0,0 +1,171 @@
+import asyncio
+import io
+import mmap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from .batching import MicroBatcher
+from .embedding_cache import embedding_cache, text_key, image_key
+from .image_store import load_image_embedding, save_image_embedding
+from .model_versions import get_active_model
+from ..database import run_db
+from ..config import (
+    INFERENCE_EXECUTOR,
+    INFERENCE_WORKERS,
+    INFERENCE_CONCURRENCY,
+    EMBED_BATCHING,
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_WAIT_MS,
+)
+
+_executor = None
+_semaphore = asyncio.Semaphore(INFERENCE_CONCURRENCY)
+_ready = False
+_load_error = None
+
+
+def _encode_batch(kind, payloads, model_name=None):
+    # Imported here so process-pool workers load the model in their own process
+    from .embeddings import encode_batch
+
+    return encode_batch(kind, payloads, model_name)
+
+
+def _warm_up(model_name=None):
+    from .embeddings import warm_up
+
+    warm_up(model_name)
+
+
+def get_executor():
+    """Return the shared inference executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        if INFERENCE_EXECUTOR == "process":
+            # Each worker process loads and warms up its own model copy
+            _executor = ProcessPoolExecutor(
+                max_workers=INFERENCE_WORKERS,
+                initializer=_warm_up,
+                initargs=(get_active_model(),),
+            )
+        elif INFERENCE_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=INFERENCE_WORKERS, thread_name_prefix="inference"
+            )
+        else:
+            raise ValueError(f"Unknown INFERENCE_EXECUTOR setting: {INFERENCE_EXECUTOR}")
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the inference executor (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Run `fn` on the inference executor without blocking the event loop.
+
+    At most INFERENCE_CONCURRENCY calls are in flight; further callers wait
+    on the semaphore instead of piling work into the executor queue.
+    """
+    global _ready, _load_error
+    loop = asyncio.get_running_loop()
+    async with _semaphore:
+        result = await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
+    # Any completed model call means inference is available
+    _ready, _load_error = True, None
+    return result
+
+
+async def warm_up():
+    """Load the active model and run a warm-up encode on the inference executor."""
+    global _ready, _load_error
+    try:
+        await run_inference(_warm_up, get_active_model())
+    except Exception as exc:
+        _load_error = str(exc)
+
+
+async def warm_up_model(model_name):
+    """Load and warm up `model_name`, raising if it cannot be loaded."""
+    await run_inference(_warm_up, model_name)
+
+
+def readiness():
+    """Return (ready, detail) describing whether inference is available."""
+    if _ready:
+        return True, "ready"
+    if _load_error:
+        return False, f"model failed to load: {_load_error}"
+    return False, "model loading"
+
+
+batcher = MicroBatcher(run_inference, _encode_batch, EMBED_BATCH_SIZE, EMBED_BATCH_WAIT_MS)
+
+
+async def _encode(kind, payload, model_name):
+    """Encode one text or image, through the micro-batcher when enabled."""
+    if isinstance(payload, mmap.mmap) and INFERENCE_EXECUTOR == "process":
+        # Mapped uploads cannot be pickled; worker processes get a copy
+        payload = io.BytesIO(payload[:])
+    if EMBED_BATCHING:
+        return await batcher.submit(kind, payload, model_name)
+    result = (await run_inference(_encode_batch, kind, [payload], model_name))[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+async def encode_many(kind, payloads, model_name=None):
+    """Encode a whole batch of texts or image buffers in one model call.
+
+    Used by bulk paths that already hold large batches and would gain nothing
+    from the micro-batcher or the query cache.
+    """
+    return await run_inference(_encode_batch, kind, list(payloads), model_name or get_active_model())
+
+
+async def _cached_encode(kind, payload, model_name):
+    """Serve repeated texts and identical image bytes from the query cache.
+
+    Images missing from the in-memory cache are looked up in the image
+    store by content hash (or a near-identical stored upload) before CLIP
+    runs, and stored uploads keep their new embedding there.
+    """
+    key = text_key(payload) if kind == "text" else image_key(payload)
+    embedding = embedding_cache.get(model_name, kind, key)
+    if embedding is not None:
+        return embedding
+    if kind == "image":
+        embedding = await run_db(load_image_embedding, key, model_name)
+    if embedding is None:
+        embedding = await _encode(kind, payload, model_name)
+        if kind == "image":
+            await run_db(save_image_embedding, key, model_name, embedding)
+    embedding_cache.put(model_name, kind, key, embedding)
+    return embedding
+
+
+async def embed(text=None, image_data=None, title=None, model_name=None):
+    """Async counterpart of `get_embedding` for route handlers.
+
+    Encodes with `model_name`, or the active model by default. Text and
+    image parts are looked up in the embedding cache first; misses are
+    encoded on the inference executor, through the shared micro-batcher
+    when EMBED_BATCHING is enabled.
+    """
+    from .embeddings import build_text, combine_embeddings
+
+    text = build_text(text, title)
+    if text is None and image_data is None:
+        raise ValueError("Provide text or image")
+
+    model_name = model_name or get_active_model()
+    parts = []
+    if text:
+        parts.append(_cached_encode("text", text, model_name))
+    if image_data:
+        parts.append(_cached_encode("image", image_data, model_name))
+    return combine_embeddings(await asyncio.gather(*parts))
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from pathlib import Path
+from ..config import UPLOAD_DIR, INGEST_WORKERS, INGEST_MAX_ATTEMPTS, INGEST_POLL_SECONDS
+from ..database import connection, run_db
+from .embedding_codec import pack_embedding
+from .inference import embed
+from .image_utils import map_image
+from .matches import update_matches
+from .model_versions import get_active_model, index_embedding, item_write
+from .vector_index import item_state
+
+logger = logging.getLogger(__name__)
+
+# Woken on enqueue so idle workers do not wait for the next poll
+_wakeup = asyncio.Event()
+_workers = []
+
+
+def enqueue_embedding(conn, item_id):
+    """Queue an embedding job for `item_id` in the caller's transaction."""
+    conn.execute(
+        "INSERT INTO embedding_jobs (item_id, status) VALUES (?, 'queued')",
+        (item_id,),
+    )
+
+
+def notify_workers():
+    _wakeup.set()
+
+
+def queue_depth(conn):
+    """Return job counts by status plus the number of pending items."""
+    counts = dict(
+        conn.execute(
+            "SELECT status, COUNT(*) FROM embedding_jobs GROUP BY status"
+        ).fetchall()
+    )
+    pending = conn.execute(
+        "SELECT COUNT(*) FROM items WHERE embedding_status = 'pending'"
+    ).fetchone()[0]
+    return {
+        "queued": counts.get("queued", 0),
+        "running": counts.get("running", 0),
+        "failed": counts.get("failed", 0),
+        "pending_items": pending,
+    }
+
+
+def _claim_job(conn):
+    """Atomically move the oldest queued job to running and return it."""
+    conn.execute("BEGIN IMMEDIATE")
+    job = conn.execute(
+        """
+        SELECT j.id, j.item_id, j.attempts, i.title, i.description, i.image_path
+        FROM embedding_jobs j JOIN items i ON i.id = j.item_id
+        WHERE j.status = 'queued' ORDER BY j.id LIMIT 1
+        """
+    ).fetchone()
+    if job:
+        conn.execute(
+            "UPDATE embedding_jobs SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (job[0],),
+        )
+    conn.commit()
+    return job
+
+
+def _finish_job(conn, job_id, item_id, embedding, model_name):
+    blob, dim, dtype = pack_embedding(embedding)
+    conn.execute(
+        "UPDATE items SET embedding = ?, embedding_dim = ?, embedding_dtype = ?, embedding_model = ?, embedding_status = 'ready' WHERE id = ?",
+        (blob, dim, dtype, model_name, item_id),
+    )
+    conn.execute("DELETE FROM embedding_jobs WHERE id = ?", (job_id,))
+    # None once the item is deleted; its status may have changed while it waited
+    state = item_state(conn, item_id)
+    conn.commit()
+    return state
+
+
+def _fail_job(conn, job_id, item_id, attempts, error):
+    final = attempts + 1 >= INGEST_MAX_ATTEMPTS
+    cursor = conn.execute(
+        "UPDATE embedding_jobs SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        ("failed" if final else "queued", error, job_id),
+    )
+    if final and cursor.rowcount:
+        conn.execute(
+            "UPDATE items SET embedding_status = 'failed' WHERE id = ?", (item_id,)
+        )
+    conn.commit()
+
+
+async def _process(job):
+    job_id, item_id, attempts, title, description, image_path = job
+    async with item_write():
+        try:
+            image_data = None
+            if image_path:
+                image_data = await asyncio.to_thread(map_image, Path(UPLOAD_DIR) / image_path)
+            model_name = get_active_model()
+            embedding = await embed(text=description, image_data=image_data, title=title, model_name=model_name)
+        except Exception as exc:
+            await run_db(_fail_job, job_id, item_id, attempts, str(exc))
+            return
+
+        state = await run_db(_finish_job, job_id, item_id, embedding, model_name)
+        if state:
+            index_embedding(item_id, embedding, model_name, state)
+    if state:
+        await update_matches([(item_id, embedding)], model_name)
+
+
+async def _worker():
+    while True:
+        job = None
+        try:
+            _wakeup.clear()
+            job = await run_db(_claim_job)
+            if job is None:
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), timeout=INGEST_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await _process(job)
+        except Exception as exc:
+            # e.g. "database is locked" past the busy timeout: keep the
+            # worker alive and give the claimed job back to the queue
+            logger.exception("Ingest worker error")
+            if job is not None:
+                try:
+                    await run_db(_fail_job, job[0], job[1], job[2], str(exc))
+                except Exception:
+                    logger.exception("Could not requeue embedding job %s", job[0])
+            await asyncio.sleep(INGEST_POLL_SECONDS)
+
+
+def start_workers():
+    """Requeue jobs interrupted by a restart and start the background workers."""
+    with connection() as conn:
+        conn.execute("UPDATE embedding_jobs SET status = 'queued' WHERE status = 'running'")
+        conn.commit()
+    for _ in range(INGEST_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
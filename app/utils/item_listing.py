@@ -0,0 +1,50 @@
+from ..config import PAGE_SIZE, MAX_PAGE_SIZE
+from .image_utils import rendition_url
+
+# Columns of a full listing row; the embedding BLOB is never selected
+FULL_COLUMNS = "id, title, description, category, location, phone, image_path, status"
+# Slim cards: the description is cut to a snippet in SQL
+SLIM_COLUMNS = "id, title, substr(description, 1, 160) AS description, category, location, phone, image_path, status"
+
+
+def image_url(image_path):
+    """Turn a stored filename into a URL under /uploads."""
+    if not image_path:
+        return None
+    if str(image_path).startswith("/uploads/"):
+        return image_path
+    return f"/uploads/{image_path}"
+
+
+def clamp_limit(limit):
+    return max(1, min(limit or PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def fetch_item_page(conn, after_id=None, limit=PAGE_SIZE, slim=False):
+    """Return one page of items, newest first, and the cursor of the next page.
+
+    Keyset pagination: the page starts below `after_id` on the primary key,
+    so every page costs an index range scan of `limit` rows no matter how
+    deep it is. The cursor is None on the last page.
+    """
+    limit = clamp_limit(limit)
+    columns = SLIM_COLUMNS if slim else FULL_COLUMNS
+    if after_id:
+        rows = conn.execute(
+            f"SELECT {columns} FROM items WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (after_id, limit + 1),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT {columns} FROM items ORDER BY id DESC LIMIT ?", (limit + 1,)
+        ).fetchall()
+
+    items = []
+    for row in rows[:limit]:
+        item = dict(row)
+        # Cards show the small rendition; image_path stays the original
+        item["thumbnail_path"] = rendition_url(item["image_path"], "thumbs")
+        item["image_path"] = image_url(item["image_path"])
+        items.append(item)
+    next_after_id = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_after_id": next_after_id}
@@ -0,0 +1,130 @@
+from ..config import MATCH_TOP_K, SIMILARITY_THRESHOLD
+from ..database import ITEM_SIDE, run_db
+from .embedding_codec import unpack_embedding
+from .image_utils import rendition_url
+from .item_listing import FULL_COLUMNS, image_url
+from .metrics import metrics
+from .model_versions import get_active_model
+from .vector_index import embedding_index
+
+OPPOSITE = {"Lost": "Found", "Found": "Lost"}
+
+
+def clear_matches(conn, item_id):
+    conn.execute("DELETE FROM matches WHERE lost_id = ? OR found_id = ?", (item_id, item_id))
+
+
+@metrics.timed("matches.find")
+def find_matches(conn, item_id, vector, model_name, k=MATCH_TOP_K):
+    """Score an item's vector against the open items on the other side.
+
+    Uses the resident search index and its side and resolved masks, so no
+    model runs and nothing is written. Keeps up to `k` candidates above
+    SIMILARITY_THRESHOLD; vectors from a model other than the active one
+    are not comparable with the index and match nothing. Returns
+    (lost_id, found_id, score) pairs.
+    """
+    if model_name != get_active_model():
+        return []
+    row = conn.execute(f"SELECT {ITEM_SIDE}, status FROM items WHERE id = ?", (item_id,)).fetchone()
+    if row is None or row[0] is None or row[1] == "Resolved":
+        return []
+    side = row[0]
+    metrics.count("rows_scanned_total", len(embedding_index), stage="matches.find")
+
+    hits = embedding_index.search(vector, k=k, exclude_resolved=True, side=OPPOSITE[side])
+    return [
+        (item_id, other, score) if side == "Lost" else (other, item_id, score)
+        for other, score in hits
+        if score > SIMILARITY_THRESHOLD
+    ]
+
+
+def insert_matches(conn, pairs, model_name):
+    """Store scored pairs (caller commits).
+
+    Pairs may have been scored outside the caller's transaction, so any
+    whose items were resolved or deleted since are skipped.
+    """
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO matches (lost_id, found_id, score, model)
+        SELECT ?1, ?2, ?3, ?4
+        WHERE (SELECT COUNT(*) FROM items WHERE id IN (?1, ?2) AND status IS NOT 'Resolved') = 2
+        """,
+        [(lost_id, found_id, score, model_name) for lost_id, found_id, score in pairs],
+    )
+
+
+def store_matches(conn, item_id, vector, model_name, k=MATCH_TOP_K):
+    """Find and store an item's best pairs; returns how many (caller commits)."""
+    pairs = find_matches(conn, item_id, vector, model_name, k)
+    insert_matches(conn, pairs, model_name)
+    return len(pairs)
+
+
+def _replace_matches(conn, found, model_name):
+    # Pairs scored just before a model cutover belong to the old model
+    if model_name != get_active_model():
+        found = [(item_id, []) for item_id, _ in found]
+    for item_id, pairs in found:
+        clear_matches(conn, item_id)
+        insert_matches(conn, pairs, model_name)
+    conn.commit()
+
+
+async def update_matches(items, model_name):
+    """Refresh the matches of freshly stored (item_id, embedding) pairs.
+
+    Call after the items are committed and added to the search index: of
+    two items stored at the same time, the later refresh then always sees
+    the other one. Candidates are scored first; replacing the stored pairs
+    is one short write transaction.
+    """
+
+    def find(conn):
+        return [
+            (item_id, find_matches(conn, item_id, embedding.cpu().numpy(), model_name))
+            for item_id, embedding in items
+        ]
+
+    found = await run_db(find)
+    await run_db(_replace_matches, found, model_name)
+
+
+async def rematch_stored(item_id):
+    """Refresh an item's matches from its stored embedding, e.g. after a status change."""
+
+    def find(conn):
+        row = conn.execute(
+            "SELECT embedding, embedding_dim, embedding_dtype, embedding_model FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None, []
+        return row[3], find_matches(conn, item_id, unpack_embedding(row[0], row[1], row[2]), row[3])
+
+    model_name, pairs = await run_db(find)
+    await run_db(_replace_matches, [(item_id, pairs)], model_name)
+
+
+def fetch_matches(conn, item_id, limit=MATCH_TOP_K):
+    """Return the stored matches of `item_id`, best first, with the matched items' listing fields."""
+    rows = conn.execute(
+        f"""
+        SELECT m.score, m.created_at AS matched_at, {FULL_COLUMNS}
+        FROM matches m
+        JOIN items ON items.id = CASE WHEN m.lost_id = ? THEN m.found_id ELSE m.lost_id END
+        WHERE m.lost_id = ? OR m.found_id = ?
+        ORDER BY m.score DESC LIMIT ?
+        """,
+        (item_id, item_id, item_id, limit),
+    ).fetchall()
+
+    matches = []
+    for row in rows:
+        match = dict(row)
+        match["score"] = round(match["score"], 3)
+        match["thumbnail_path"] = rendition_url(match["image_path"], "thumbs")
+        match["image_path"] = image_url(match["image_path"])
+        matches.append(match)
+    return matches
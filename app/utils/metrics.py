@@ -0,0 +1,205 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from ..config import METRICS_ENABLED, SERVER_TIMING
+
+# Upper bounds (seconds) for stage latencies: sub-millisecond DB lookups up
+# to multi-second cold model calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024**2, 2 * 1024**2, 5 * 1024**2, 10 * 1024**2, 25 * 1024**2)
+
+# name -> (type, help, buckets); exported with the "lostfound_" prefix
+METRICS = {
+    "stage_seconds": ("histogram", "Wall time of each request stage.", LATENCY_BUCKETS),
+    "db_seconds": ("histogram", "run_db time waiting for a database thread (queue) and running (query).", LATENCY_BUCKETS),
+    "model_seconds": ("histogram", "Wall time of CLIP encode calls.", LATENCY_BUCKETS),
+    "model_calls_total": ("counter", "CLIP encode calls.", None),
+    "model_items_total": ("counter", "Texts and images encoded by CLIP.", None),
+    "rows_scanned_total": ("counter", "Rows or vectors read by each stage.", None),
+    "upload_bytes": ("histogram", "Size of accepted image uploads.", SIZE_BUCKETS),
+}
+
+_NOOP = nullcontext()
+
+# (stage, seconds) pairs of the current request, for its Server-Timing header
+_request_stages = ContextVar("request_stages", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "stages", "start")
+
+    def __init__(self, registry, name, labels, stages=None):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.stages = stages
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.registry.observe(self.name, elapsed, **self.labels)
+        if self.stages is not None:
+            self.stages.append((self.labels["stage"], elapsed))
+        return False
+
+
+class Metrics:
+    """In-process counters and histograms rendered as Prometheus text.
+
+    Series are keyed by metric name and label values. Stage timings are
+    also collected per request (see `collect_stages`) for the Server-Timing
+    header. When both are disabled every call returns immediately and
+    `timed` leaves functions unwrapped, so the instrumented hot paths pay
+    for one attribute check at most.
+    """
+
+    def __init__(self, enabled: bool, per_request: bool = False):
+        self.enabled = enabled
+        self.per_request = per_request
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Histogram(buckets)
+            series.counts[bisect_left(buckets, value)] += 1
+            series.sum += value
+
+    def count(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def stage(self, stage):
+        """Context manager timing a block into stage_seconds{stage=...}."""
+        stages = _request_stages.get()
+        if not self.enabled and stages is None:
+            return _NOOP
+        return _Timer(self, "stage_seconds", {"stage": stage}, stages)
+
+    @contextmanager
+    def collect_stages(self):
+        """Collect the (stage, seconds) pairs timed inside the block.
+
+        Work handed to `asyncio.to_thread` inherits the collection; work on
+        the database and inference executors does not.
+        """
+        stages = []
+        token = _request_stages.set(stages)
+        try:
+            yield stages
+        finally:
+            _request_stages.reset(token)
+
+    def timer(self, name, **labels):
+        """Context manager timing a block into histogram `name`."""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels)
+
+    def timed(self, stage):
+        """Decorator timing a sync or async function as one stage."""
+
+        def decorate(fn):
+            if not self.enabled and not self.per_request:
+                return fn
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    with self.stage(stage):
+                        return await fn(*args, **kwargs)
+
+            else:
+
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    with self.stage(stage):
+                        return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        """Return every series in the Prometheus text exposition format."""
+        with self._lock:
+            snapshot = {
+                key: (value if isinstance(value, (int, float)) else (list(value.counts), value.sum))
+                for key, value in self._series.items()
+            }
+
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = sorted((labels, value) for (n, labels), value in snapshot.items() if n == name)
+            if not series:
+                continue
+            full_name = f"lostfound_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in series:
+                if kind == "counter":
+                    lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip((*buckets, "+Inf"), counts):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+                lines.append(f"{full_name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{full_name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(stages, total):
+    """Format (stage, seconds) pairs and the request total as a Server-Timing header."""
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+metrics = Metrics(METRICS_ENABLED, SERVER_TIMING)
@@ -0,0 +1,180 @@
+import asyncio
+from contextlib import asynccontextmanager
+from ..config import MODEL_NAME
+from ..database import get_setting, run_db
+from .ann_index import make_ann_index
+from .vector_index import EmbeddingIndex, embedding_index
+
+# Model whose vectors live in items.embedding and answer queries
+_active_model = MODEL_NAME
+_activation_lock = asyncio.Lock()
+
+# Item writes that embed with the active model or change the index hold the
+# write gate; activation closes it while it loads the new index and cuts over
+_writes_open = asyncio.Event()
+_writes_open.set()
+_writes_drained = asyncio.Event()
+_writes_drained.set()
+_writes_in_flight = 0
+
+
+@asynccontextmanager
+async def item_write():
+    """Hold around an item write that embeds with or updates the search index.
+
+    Waits while a model activation is building and swapping in the new
+    index, so no write lands in the old index after the new one was read.
+    """
+    global _writes_in_flight
+    while not _writes_open.is_set():
+        await _writes_open.wait()
+    _writes_in_flight += 1
+    _writes_drained.clear()
+    try:
+        yield
+    finally:
+        _writes_in_flight -= 1
+        if not _writes_in_flight:
+            _writes_drained.set()
+
+
+def get_active_model():
+    return _active_model
+
+
+def load_active_model(conn):
+    """Read the active model from the settings table into this process."""
+    global _active_model
+    _active_model = get_setting(conn, "active_model", MODEL_NAME)
+    return _active_model
+
+
+def index_embedding(item_id, embedding, model_name, state=None):
+    """Add a freshly stored vector to the search index if its model is active.
+
+    A vector computed just before a cutover belongs to the old model and
+    must not be mixed into the new index. `state` is the item's current
+    (side, resolved) pair from `item_state` (None keeps the indexed one).
+    """
+    if model_name == _active_model:
+        embedding_index.upsert(item_id, embedding.cpu().numpy(), state)
+
+
+def list_models(conn):
+    """Describe the active model and any staged model with its coverage."""
+    total = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    models = []
+    for name, dim, count in conn.execute(
+        "SELECT embedding_model, MAX(embedding_dim), COUNT(*) FROM items WHERE embedding IS NOT NULL GROUP BY embedding_model"
+    ).fetchall():
+        models.append(
+            {"name": name, "state": "active" if name == _active_model else "stale", "dim": dim, "items": count}
+        )
+    for name, dim, count in conn.execute(
+        "SELECT model_name, MAX(embedding_dim), COUNT(*) FROM item_embeddings GROUP BY model_name"
+    ).fetchall():
+        models.append({"name": name, "state": "staged", "dim": dim, "items": count})
+    return {"active_model": _active_model, "total_items": total, "models": models}
+
+
+def _staged_coverage(conn, model_name):
+    """Count staged vectors for `model_name` and embedded items still lacking one."""
+    staged = conn.execute(
+        "SELECT COUNT(*) FROM item_embeddings WHERE model_name = ?", (model_name,)
+    ).fetchone()[0]
+    missing = conn.execute(
+        "SELECT COUNT(*) FROM items WHERE embedding IS NOT NULL AND id NOT IN (SELECT item_id FROM item_embeddings WHERE model_name = ?)",
+        (model_name,),
+    ).fetchone()[0]
+    return staged, missing
+
+
+def _cutover(conn, model_name):
+    """Move staged vectors into items and flip the active model in one transaction.
+
+    Stored matches were scored in the old model's embedding space and are
+    dropped with it; rebuild_matches.py rescores them.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(
+        """
+        UPDATE items SET
+            embedding = (SELECT e.embedding FROM item_embeddings e WHERE e.item_id = items.id AND e.model_name = ?),
+            embedding_dim = (SELECT e.embedding_dim FROM item_embeddings e WHERE e.item_id = items.id AND e.model_name = ?),
+            embedding_dtype = (SELECT e.embedding_dtype FROM item_embeddings e WHERE e.item_id = items.id AND e.model_name = ?),
+            embedding_model = ?,
+            embedding_status = 'ready'
+        WHERE id IN (SELECT item_id FROM item_embeddings WHERE model_name = ?)
+        """,
+        (model_name, model_name, model_name, model_name, model_name),
+    )
+    conn.execute("DELETE FROM item_embeddings WHERE model_name = ?", (model_name,))
+    conn.execute("DELETE FROM matches WHERE model IS NOT ?", (model_name,))
+    conn.execute(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES ('active_model', ?)",
+        (model_name,),
+    )
+    conn.commit()
+
+
+async def reload_index():
+    """Reload the search index from the active model's stored vectors.
+
+    Used after reembed.py rewrote them in place. Item writes are paused
+    while the index is rebuilt and swapped; searches keep using the current
+    one. Like activation, this only reloads the process serving the request.
+    """
+    async with _activation_lock:
+        _writes_open.clear()
+        try:
+            await _writes_drained.wait()
+            new_index = EmbeddingIndex(ann=make_ann_index())
+            await run_db(new_index.load, _active_model)
+            embedding_index.replace_with(new_index)
+        finally:
+            _writes_open.set()
+        return {"active_model": _active_model, "indexed": len(new_index)}
+
+
+async def activate_model(model_name, force=False):
+    """Switch search to `model_name` once its staged vectors are complete.
+
+    The new model is warmed up while everything keeps running. Item
+    writes are then paused (see `item_write`) while the new index is
+    loaded, the database is updated and the indexes are swapped; searches
+    keep using the current index throughout. Without `force`, activation
+    is refused while some items still lack a staged vector.
+
+    The active model is held per process: with several server workers,
+    only the one serving this request switches over, so run a single
+    worker or restart the others afterwards (they read the active model
+    from the settings table at startup).
+    """
+    global _active_model
+    from .inference import warm_up_model
+
+    async with _activation_lock:
+        if model_name == _active_model:
+            raise ValueError(f"{model_name} is already the active model")
+
+        staged, missing = await run_db(_staged_coverage, model_name)
+        if not staged:
+            raise ValueError(f"No staged embeddings for {model_name}; run reembed.py --model {model_name}")
+        if missing and not force:
+            raise ValueError(
+                f"{missing} items have no {model_name} embedding yet; rerun reembed.py --model {model_name} --missing-only"
+            )
+
+        await warm_up_model(model_name)
+
+        _writes_open.clear()
+        try:
+            await _writes_drained.wait()
+            new_index = EmbeddingIndex(ann=make_ann_index())
+            await run_db(new_index.load, model_name, staged=True)
+            await run_db(_cutover, model_name)
+            embedding_index.replace_with(new_index)
+            previous, _active_model = _active_model, model_name
+        finally:
+            _writes_open.set()
+        return {"active_model": model_name, "previous_model": previous, "indexed": len(new_index), "missing": missing}
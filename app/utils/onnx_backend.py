@@ -0,0 +1,184 @@
+import json
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from ..config import ONNX_MODEL_DIR, TORCH_NUM_THREADS
+
+# Written by export_onnx() next to the towers and the saved CLIP processor
+MANIFEST = "manifest.json"
+# CLIP's text context length
+MAX_TEXT_LENGTH = 77
+
+
+def export_dir(model_name: str, root=ONNX_MODEL_DIR) -> Path:
+    """Directory holding the ONNX export of `model_name`."""
+    return Path(root) / model_name.replace("/", "__")
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as exc:
+        raise ImportError(
+            "INFERENCE_BACKEND=onnx requires the optional 'onnxruntime' package (pip install onnxruntime)"
+        ) from exc
+    return onnxruntime
+
+
+class OnnxClipModel:
+    """CLIP text and vision towers exported to ONNX, run by ONNX Runtime on CPU.
+
+    Implements the subset of `SentenceTransformer.encode` that
+    embeddings.py relies on, so the two backends are interchangeable.
+    Embeddings are the projected CLIP features, the same vectors the
+    sentence-transformers CLIP module returns.
+    """
+
+    def __init__(self, model_dir, quantized: bool = True, threads: int = TORCH_NUM_THREADS):
+        ort = _import_onnxruntime()
+        from transformers import CLIPProcessor
+
+        model_dir = Path(model_dir)
+        manifest_path = model_dir / MANIFEST
+        if not manifest_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX export in {model_dir}; run python export_onnx.py --model <name> first"
+            )
+        self.manifest = json.loads(manifest_path.read_text())
+        self.variant = "int8" if quantized and "int8" in self.manifest["files"] else "fp32"
+        files = self.manifest["files"][self.variant]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        self._text = ort.InferenceSession(str(model_dir / files["text"]), options, providers=providers)
+        self._vision = ort.InferenceSession(str(model_dir / files["vision"]), options, providers=providers)
+        self._processor = CLIPProcessor.from_pretrained(model_dir)
+
+    def _encode_texts(self, texts):
+        tokens = self._processor.tokenizer(
+            texts, padding=True, truncation=True, max_length=MAX_TEXT_LENGTH, return_tensors="np"
+        )
+        feeds = {
+            "input_ids": tokens["input_ids"].astype(np.int64),
+            "attention_mask": tokens["attention_mask"].astype(np.int64),
+        }
+        return self._text.run(None, feeds)[0]
+
+    def _encode_images(self, images):
+        pixels = self._processor.image_processor(images=images, return_tensors="np")["pixel_values"]
+        return self._vision.run(None, {"pixel_values": pixels.astype(np.float32)})[0]
+
+    def encode(self, inputs, batch_size: int = 32, convert_to_tensor: bool = False, normalize_embeddings: bool = False):
+        """Encode one text or PIL image, or a list of either kind.
+
+        Returns a 2-D array (a torch tensor with `convert_to_tensor`) for
+        lists and a single row for a single input, like SentenceTransformer.
+        """
+        single = isinstance(inputs, (str, Image.Image))
+        items = [inputs] if single else list(inputs)
+        encode = self._encode_texts if all(isinstance(i, str) for i in items) else self._encode_images
+
+        embeddings = np.concatenate(
+            [encode(items[start:start + batch_size]) for start in range(0, len(items), batch_size)]
+        ).astype(np.float32)
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if convert_to_tensor:
+            import torch
+
+            embeddings = torch.from_numpy(embeddings)
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx(model_name: str, out_dir=None, quantize: bool = True, opset: int = 17) -> Path:
+    """Export the CLIP towers of a sentence-transformers model to ONNX.
+
+    Writes text.onnx and vision.onnx (fp32, dynamic batch size), the CLIP
+    processor and a manifest to `out_dir`. With `quantize`, it also writes
+    dynamically quantized int8 copies: weights of the MatMul/Gemm layers
+    are stored as int8 and activations are quantized at run time.
+    Convolutions stay fp32 because ConvInteger is slow on most CPUs.
+    Returns the export directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out = Path(out_dir) if out_dir else export_dir(model_name)
+    out.mkdir(parents=True, exist_ok=True)
+
+    clip_module = SentenceTransformer(model_name, device="cpu")[0]
+    clip, processor = clip_module.model.eval(), clip_module.processor
+
+    class TextTower(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, input_ids, attention_mask):
+            return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, pixel_values):
+            return self.clip.get_image_features(pixel_values=pixel_values)
+
+    tokens = processor.tokenizer(
+        ["a black backpack", "keys"], padding="max_length", max_length=MAX_TEXT_LENGTH, return_tensors="pt"
+    )
+    crop = processor.image_processor.crop_size
+    pixels = torch.zeros(2, 3, crop["height"], crop["width"])
+    with torch.no_grad():
+        torch.onnx.export(
+            TextTower(),
+            (tokens["input_ids"], tokens["attention_mask"]),
+            str(out / "text.onnx"),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["text_embeds"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "text_embeds": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+        torch.onnx.export(
+            VisionTower(),
+            (pixels,),
+            str(out / "vision.onnx"),
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    processor.save_pretrained(out)
+
+    files = {"fp32": {"text": "text.onnx", "vision": "vision.onnx"}}
+    if quantize:
+        _import_onnxruntime()
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        for tower in ("text", "vision"):
+            quantize_dynamic(
+                str(out / f"{tower}.onnx"),
+                str(out / f"{tower}.int8.onnx"),
+                op_types_to_quantize=["MatMul", "Gemm"],
+                weight_type=QuantType.QInt8,
+            )
+        files["int8"] = {"text": "text.int8.onnx", "vision": "vision.int8.onnx"}
+
+    manifest = {
+        "model": model_name,
+        "dim": clip.config.projection_dim,
+        "opset": opset,
+        "files": files,
+    }
+    (out / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return out
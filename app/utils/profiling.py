@@ -0,0 +1,124 @@
+import random
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from ..config import (
+    PROFILE_ENABLED,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_HEADER,
+    PROFILE_DIR,
+    PROFILE_KEEP,
+    PROFILE_INTERVAL,
+)
+
+# <timestamp>-<method>-<path>-<ms>ms.html; anything else is not served
+PROFILE_NAME = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[A-Z]+-[\w.-]*-[0-9]+ms\.html$")
+
+
+def _load_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError as exc:
+        raise ImportError(
+            "Request profiling requires the optional 'pyinstrument' package (pip install pyinstrument)"
+        ) from exc
+    return Profiler
+
+
+class RequestProfiler:
+    """Runtime switch and storage for sampled per-request profiles.
+
+    While enabled, `sample_rate` of requests and every request sent with
+    the `header` header run under pyinstrument's statistical profiler, and
+    an HTML report is written to `directory` (oldest beyond `keep` are
+    removed). Admins flip the switch through the /profiling endpoints.
+    """
+
+    def __init__(self, enabled, sample_rate, header, directory, keep, interval):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.header = header
+        self.directory = Path(directory)
+        self.keep = keep
+        self.interval = interval
+        self._lock = threading.Lock()
+        if enabled:
+            self.configure(enabled=True)
+
+    def configure(self, enabled=None, sample_rate=None):
+        """Update the switch; raises ValueError or ImportError on bad input."""
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if enabled:
+            _load_profiler()
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if enabled is not None:
+            self.enabled = enabled
+
+    def settings(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "header": self.header,
+            "directory": str(self.directory),
+        }
+
+    def should_profile(self, headers) -> bool:
+        if not self.enabled:
+            return False
+        return bool(headers.get(self.header)) or random.random() < self.sample_rate
+
+    def start(self):
+        """Start and return a profiler for the current request."""
+        profiler = _load_profiler()(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        return profiler
+
+    def save(self, profiler, method, path, seconds) -> str:
+        """Write a stopped profiler's HTML report and return its file name."""
+        slug = re.sub(r"[^\w.-]+", "_", path.strip("/"))[:60] or "root"
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{method}-{slug}-{round(seconds * 1000)}ms.html"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(profiler.output_html(), encoding="utf-8")
+        with self._lock:
+            for stale in self._files()[self.keep:]:
+                stale.unlink(missing_ok=True)
+        return name
+
+    def _files(self):
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            (p for p in self.directory.iterdir() if PROFILE_NAME.match(p.name)),
+            key=lambda p: p.name,
+            reverse=True,
+        )
+
+    def list_profiles(self):
+        """Return the stored profiles, newest first."""
+        profiles = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            profiles.append({
+                "name": path.name,
+                "bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            })
+        return profiles
+
+    def profile_path(self, name):
+        """Return the path of a stored profile, or None for unknown names."""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+request_profiler = RequestProfiler(
+    PROFILE_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_HEADER, PROFILE_DIR, PROFILE_KEEP, PROFILE_INTERVAL
+)
@@ -0,0 +1,312 @@
+import threading
+import numpy as np
+from .embedding_codec import unpack_embedding
+from .ann_index import make_ann_index
+from ..config import ANN_MIN_ITEMS
+from ..database import ITEM_SIDE
+
+# Per-row side codes; 0 is an item that is neither lost nor found
+SIDES = {"Lost": 1, "Found": 2}
+
+
+def item_state(conn, item_id):
+    """Return the (side, resolved) index state of a stored item, or None if it does not exist."""
+    row = conn.execute(f"SELECT {ITEM_SIDE}, status FROM items WHERE id = ?", (item_id,)).fetchone()
+    return None if row is None else (row[0], row[1] == "Resolved")
+
+
+class EmbeddingIndex:
+    """Process-resident matrix of normalized item embeddings.
+
+    Rows are kept L2-normalized so a single matrix-vector product gives the
+    cosine similarity of the query against every item. When an ANN backend
+    is configured and the table holds at least `ann_min_items` rows, it
+    narrows the candidates first and only those rows are scored; smaller
+    tables always use exact search. The ANN structure is retrained on a
+    snapshot in a background thread once the table outgrows it, while
+    searches keep using the previous one (or exact search before the
+    first build). Each row also keeps the item's side (lost or found) and
+    resolved flag, so searches can be restricted to open items of one side
+    without asking the database.
+    """
+
+    def __init__(self, ann=None, ann_min_items: int = ANN_MIN_ITEMS):
+        self._lock = threading.Lock()
+        self._ann = ann
+        self._ann_min_items = ann_min_items
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._resolved = np.zeros(0, dtype=bool)
+        self._sides = np.zeros(0, dtype=np.int8)
+        self._positions = {}
+        self._size = 0
+        # Bumped whenever the contents are replaced wholesale, so a
+        # background ANN build of older contents is discarded
+        self._generation = 0
+        self._ann_building = False
+        self._ann_changes = None
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _reserve(self, dim, capacity):
+        """Grow the backing arrays (amortized doubling) to hold `capacity` rows."""
+        if self._matrix.shape[1] != dim:
+            if self._size:
+                raise ValueError(
+                    f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}"
+                )
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+        if capacity <= self._matrix.shape[0]:
+            return
+        new_capacity = max(capacity, 2 * self._matrix.shape[0], 64)
+        matrix = np.zeros((new_capacity, dim), dtype=np.float32)
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        resolved = np.zeros(new_capacity, dtype=bool)
+        sides = np.zeros(new_capacity, dtype=np.int8)
+        matrix[: self._size] = self._matrix[: self._size]
+        ids[: self._size] = self._ids[: self._size]
+        resolved[: self._size] = self._resolved[: self._size]
+        sides[: self._size] = self._sides[: self._size]
+        self._matrix, self._ids, self._resolved, self._sides = matrix, ids, resolved, sides
+
+    def load(self, conn, model_name, staged=False):
+        """Rebuild the index from the stored embeddings of `model_name`.
+
+        Reads items.embedding for the active model, or the item_embeddings
+        staging table when `staged` is set (a model being rolled out).
+        """
+        if staged:
+            query = (
+                f"SELECT e.item_id, e.embedding, e.embedding_dim, e.embedding_dtype, i.status, {ITEM_SIDE} "
+                "FROM item_embeddings e JOIN items i ON i.id = e.item_id WHERE e.model_name = ?"
+            )
+        else:
+            query = (
+                f"SELECT id, embedding, embedding_dim, embedding_dtype, status, {ITEM_SIDE} FROM items "
+                "WHERE embedding IS NOT NULL AND embedding_model = ?"
+            )
+        rows = conn.execute(query, (model_name,)).fetchall()
+        ids = [r[0] for r in rows]
+        vectors = [unpack_embedding(r[1], r[2], r[3]) for r in rows]
+        resolved = [r[4] == "Resolved" for r in rows]
+        sides = [SIDES.get(r[5], 0) for r in rows]
+
+        matrix = None
+        ann = self._ann
+        if ids:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+            # Train outside the lock; the current contents keep serving meanwhile
+            if ann is not None and len(ids) >= self._ann_min_items:
+                ann = ann.empty()
+                ann.build(np.asarray(ids, dtype=np.int64), matrix)
+
+        with self._lock:
+            self._generation += 1
+            self._positions = {}
+            self._size = 0
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._resolved = np.zeros(0, dtype=bool)
+            self._sides = np.zeros(0, dtype=np.int8)
+            if ann is not None and ann is self._ann:
+                ann = ann.empty()
+            self._ann = ann
+            if not ids:
+                return
+            self._reserve(matrix.shape[1], len(ids))
+            self._matrix[: len(ids)] = matrix
+            self._ids[: len(ids)] = ids
+            self._resolved[: len(ids)] = resolved
+            self._sides[: len(ids)] = sides
+            self._positions = {item_id: pos for pos, item_id in enumerate(ids)}
+            self._size = len(ids)
+
+    def replace_with(self, other):
+        """Atomically take over the contents of `other` (used at model cutover)."""
+        with self._lock, other._lock:
+            self._generation += 1
+            self._matrix, self._ids = other._matrix, other._ids
+            self._resolved, self._sides = other._resolved, other._sides
+            self._positions, self._size = other._positions, other._size
+            self._ann, self._ann_min_items = other._ann, other._ann_min_items
+
+    def upsert(self, item_id, embedding, state=None):
+        """Insert or replace the vector stored for `item_id`.
+
+        `state` is the item's (side, resolved) pair from `item_state`; None
+        keeps the current one (new items start open and on neither side).
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            pos = self._positions.get(item_id)
+            if pos is None:
+                self._reserve(vector.shape[0], self._size + 1)
+                pos = self._size
+                self._positions[item_id] = pos
+                self._ids[pos] = item_id
+                self._resolved[pos] = False
+                self._sides[pos] = 0
+                self._size += 1
+            elif vector.shape[0] != self._matrix.shape[1]:
+                raise ValueError("Embedding dimension does not match index dimension")
+            self._matrix[pos] = vector
+            if state is not None:
+                self._set_state(pos, state)
+            if self._ann is not None:
+                self._ann.add(item_id, vector)
+            if self._ann_changes is not None:
+                self._ann_changes.add(item_id)
+
+    def remove(self, item_id):
+        """Drop `item_id` from the index by moving the last row into its slot."""
+        with self._lock:
+            pos = self._positions.pop(item_id, None)
+            if pos is None:
+                return
+            if self._ann is not None:
+                self._ann.remove(item_id)
+            if self._ann_changes is not None:
+                self._ann_changes.add(item_id)
+            last = self._size - 1
+            if pos != last:
+                moved_id = int(self._ids[last])
+                self._matrix[pos] = self._matrix[last]
+                self._ids[pos] = moved_id
+                self._resolved[pos] = self._resolved[last]
+                self._sides[pos] = self._sides[last]
+                self._positions[moved_id] = pos
+            self._size = last
+
+    def _set_state(self, pos, state):
+        side, resolved = state
+        self._sides[pos] = SIDES.get(side, 0)
+        self._resolved[pos] = resolved
+
+    def set_state(self, item_id, state):
+        """Update the (side, resolved) state of `item_id` after a status or category change."""
+        with self._lock:
+            pos = self._positions.get(item_id)
+            if pos is not None:
+                self._set_state(pos, state)
+
+    def build_ann(self):
+        """Train a fresh ANN structure on a snapshot of the rows and swap it in.
+
+        Training runs outside the lock, so searches and writes carry on;
+        rows added or removed meanwhile are replayed into the new structure
+        before the swap.
+        """
+        with self._lock:
+            if self._ann is None:
+                return
+            generation = self._generation
+            ids = self._ids[: self._size].copy()
+            matrix = self._matrix[: self._size].copy()
+            ann = self._ann.empty()
+            self._ann_changes = set()
+        try:
+            ann.build(ids, matrix)
+        finally:
+            with self._lock:
+                changes, self._ann_changes = self._ann_changes, None
+                if generation == self._generation:
+                    for item_id in changes:
+                        pos = self._positions.get(item_id)
+                        if pos is None:
+                            ann.remove(item_id)
+                        else:
+                            ann.add(item_id, self._matrix[pos])
+                    self._ann = ann
+
+    def _build_ann_in_background(self):
+        try:
+            self.build_ann()
+        finally:
+            with self._lock:
+                self._ann_building = False
+
+    def _ann_positions(self, query, k):
+        """Row positions of the ANN candidates for `query`, or None before the first build (lock held)."""
+        # Retrain once the table has outgrown the last training run
+        if not self._ann.trained or self._size > 2 * self._ann.trained_size:
+            if not self._ann_building:
+                self._ann_building = True
+                threading.Thread(target=self._build_ann_in_background, daemon=True).start()
+            if not self._ann.trained:
+                return None
+        candidates = self._ann.candidates(query, k)
+        positions = [self._positions[i] for i in candidates.tolist() if i in self._positions]
+        return np.asarray(positions, dtype=np.int64)
+
+    def search(self, query, k=10, allowed_ids=None, exclude_resolved=False, side=None):
+        """Return up to `k` (item_id, similarity) pairs, best first.
+
+        `allowed_ids` restricts the search to a prefiltered candidate set
+        (e.g. ids matching SQL filters), `exclude_resolved` leaves out
+        resolved items and `side` keeps only "Lost" or "Found" items: they
+        become a boolean mask over the rows and only masked rows are
+        scored. With an ANN backend the candidate list is oversampled by
+        the mask's selectivity and masked; if too few candidates survive,
+        the masked rows are scored exactly instead.
+        """
+        query = self._normalize(query)
+        with self._lock:
+            if not self._size:
+                return []
+            if query.shape[0] != self._matrix.shape[1]:
+                raise ValueError("Query dimension does not match index dimension")
+
+            mask = None
+            allowed = self._size
+            if exclude_resolved:
+                mask = ~self._resolved[: self._size]
+            if side is not None:
+                on_side = self._sides[: self._size] == SIDES[side]
+                mask = on_side if mask is None else mask & on_side
+            if allowed_ids is not None:
+                allowed_ids = np.asarray(list(allowed_ids), dtype=np.int64)
+                in_filter = np.isin(self._ids[: self._size], allowed_ids)
+                mask = in_filter if mask is None else mask & in_filter
+            if mask is not None:
+                allowed = int(mask.sum())
+                if not allowed:
+                    return []
+
+            positions = None
+            if self._ann is not None and allowed >= self._ann_min_items:
+                ann_k = min(self._size, -(-k * self._size // allowed))
+                positions = self._ann_positions(query, ann_k)
+                if positions is not None and mask is not None:
+                    positions = positions[mask[positions]]
+                    if positions.shape[0] < k:
+                        positions = None
+            if positions is None and mask is not None:
+                positions = np.flatnonzero(mask)
+
+            if positions is None:
+                scores = self._matrix[: self._size] @ query
+                ids = self._ids[: self._size].copy()
+            else:
+                scores = self._matrix[positions] @ query
+                ids = self._ids[positions]
+
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+# Shared index used by the item and search routes
+embedding_index = EmbeddingIndex(ann=make_ann_index())
@@ -0,0 +1,116 @@
+"""
+Recall-vs-exact benchmark for the approximate nearest-neighbour backends.
+
+Builds an exact index and each ANN backend over the same vectors, runs the
+same queries through all of them and reports recall@k against exact search
+together with mean query latency, for a sweep of nprobe (IVF) and ef (HNSW)
+values. Vectors are synthetic clustered 768-dim embeddings by default, or
+the stored item embeddings when --db is given.
+
+Usage:
+    python benchmarks/ann_recall.py [--items 50000] [--queries 200] [--k 10]
+    python benchmarks/ann_recall.py --db database.db
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.ann_index import IVFIndex, HNSWIndex
+from app.utils.embedding_codec import unpack_embedding
+from app.utils.vector_index import EmbeddingIndex
+
+
+def synthetic_vectors(n, dim, clusters, seed=0):
+    """Return `n` normalized vectors drawn around `clusters` random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centres[labels] + 1.2 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_vectors(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT embedding, embedding_dim, embedding_dtype FROM items WHERE embedding IS NOT NULL"
+    ).fetchall()
+    conn.close()
+    return np.stack([unpack_embedding(*r) for r in rows]).astype(np.float32)
+
+
+def run(index, queries, k):
+    """Return (results, mean latency in ms) for `queries` against `index`."""
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append({item_id for item_id, _ in index.search(q, k)})
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def build(vectors, ann):
+    index = EmbeddingIndex(ann=ann, ann_min_items=0 if ann else 1 << 62)
+    start = time.perf_counter()
+    for item_id, vector in enumerate(vectors, start=1):
+        index.upsert(item_id, vector)
+    if ann is not None:
+        index.build_ann()
+    return index, time.perf_counter() - start
+
+
+def recall(truth, found):
+    return sum(len(t & f) for t, f in zip(truth, found)) / sum(len(t) for t in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--db", help="benchmark the embeddings stored in this SQLite database")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.db) if args.db else synthetic_vectors(args.items, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, k={args.k}\n")
+    print(f"{'backend':<18}{'recall@k':>10}{'ms/query':>10}{'build s':>10}")
+
+    exact, build_s = build(vectors, None)
+    truth, ms = run(exact, queries, args.k)
+    print(f"{'exact':<18}{1.0:>10.3f}{ms:>10.2f}{build_s:>10.2f}")
+
+    ivf = IVFIndex()
+    index, build_s = build(vectors, ivf)
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, ms = run(index, queries, args.k)
+        print(f"{'ivf nprobe=' + str(nprobe):<18}{recall(truth, found):>10.3f}{ms:>10.2f}{build_s:>10.2f}")
+
+    try:
+        hnsw = HNSWIndex()
+    except ImportError as e:
+        print(f"\nSkipping HNSW: {e}")
+        return
+    index, build_s = build(vectors, hnsw)
+    for ef in args.ef:
+        hnsw.ef = ef
+        found, ms = run(index, queries, args.k)
+        print(f"{'hnsw ef=' + str(ef):<18}{recall(truth, found):>10.3f}{ms:>10.2f}{build_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
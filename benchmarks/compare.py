@@ -0,0 +1,83 @@
+"""
+Compare two benchmark result files written by suite.py.
+
+Prints p50/p99 for every micro-benchmark and load-test scenario present in
+either run, and the change from the baseline. A change larger than
+--threshold (default 10%) in either direction is flagged; exits non-zero
+when any p50 regresses by more than that, so it can gate a CI job.
+
+Usage:
+    python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(before, after):
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before
+
+
+def fmt(value, digits=3):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def compare(baseline, candidate, threshold):
+    """Print the comparison table and return the names of regressed entries."""
+    regressions = []
+    for section in ("micro", "load"):
+        names = list(dict.fromkeys([*baseline.get(section, {}), *candidate.get(section, {})]))
+        if not names:
+            continue
+        print(f"\n{section}")
+        print(f"  {'name':<32}{'p50 before':>12}{'p50 after':>12}{'Δ':>9}{'p99 before':>12}{'p99 after':>12}{'Δ':>9}")
+        for name in names:
+            a = baseline.get(section, {}).get(name, {})
+            b = candidate.get(section, {}).get(name, {})
+            row = f"  {name:<32}"
+            for metric in ("p50_ms", "p99_ms"):
+                delta = change(a.get(metric), b.get(metric))
+                flag = ""
+                if delta is not None and abs(delta) > threshold:
+                    flag = " ▲" if delta > 0 else " ▼"
+                    if delta > 0 and metric == "p50_ms":
+                        regressions.append(f"{section}/{name}")
+                row += f"{fmt(a.get(metric)):>12}{fmt(b.get(metric)):>12}{(fmt(delta * 100, 1) + '%' if delta is not None else '-') + flag:>9}"
+            print(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change to flag (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"Baseline:  {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}, {baseline['dataset'].get('items')} items)")
+    print(f"Candidate: {candidate['meta'].get('commit')} ({candidate['meta'].get('timestamp')}, {candidate['dataset'].get('items')} items)")
+    changed = {
+        k: (v, candidate["meta"]["settings"].get(k))
+        for k, v in baseline["meta"].get("settings", {}).items()
+        if candidate["meta"].get("settings", {}).get(k) != v
+    }
+    for name, (before, after) in changed.items():
+        print(f"⚠️  {name} differs: {before} → {after}")
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} p50 regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No p50 regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
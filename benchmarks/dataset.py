@@ -0,0 +1,197 @@
+"""
+Synthetic lost-and-found catalog generator for benchmarks.
+
+Writes `--items` reproducible items (seeded) straight into DB_PATH and
+UPLOAD_DIR under the output directory: titles and descriptions built
+from item types, colours, brands, serial numbers and names, a spread of
+categories, statuses, locations and creation dates, and generated JPEG
+photos for a share of the items. Embeddings are synthetic by default:
+normalized vectors clustered by item type, which exercise search and
+storage without loading CLIP. `--embeddings model` encodes the catalog
+with the configured model instead.
+
+Run the server from the output directory to browse the catalog.
+
+Usage:
+    python benchmarks/dataset.py --out /tmp/lf-bench [--items 10000] [--seed 0] [--image-ratio 0.5]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+ITEM_TYPES = [
+    "backpack", "wallet", "phone", "laptop", "water bottle", "umbrella", "jacket",
+    "hoodie", "keys", "student ID card", "earbuds", "headphones", "calculator",
+    "notebook", "glasses", "watch", "charger", "USB drive", "scarf", "lunch box",
+]
+COLOURS = {
+    "black": (20, 20, 20), "white": (235, 235, 235), "red": (200, 30, 40),
+    "blue": (30, 70, 200), "green": (40, 150, 60), "grey": (128, 128, 128),
+    "brown": (110, 70, 40), "pink": (230, 120, 170), "yellow": (230, 200, 40),
+}
+BRANDS = ["JanSport", "Nike", "Apple", "Samsung", "Hydro Flask", "North Face", "Casio", "Sony", "Dell", "Adidas"]
+LOCATIONS = [
+    "Main Library", "Science Building", "Cafeteria", "Gym", "Student Center",
+    "Lecture Hall A", "Lecture Hall B", "Parking Lot", "Dormitory 3", "Bus Stop",
+]
+NAMES = ["Maria Lopez", "Chen Wei", "Aisha Khan", "John Smith", "Yuki Tanaka", "Omar Haddad"]
+# (category, status) mix of a live catalog: most items are open, some resolved
+STATES = [("Lost", "Lost")] * 5 + [("Found", "Found")] * 4 + [("Lost", "Resolved"), ("Found", "Resolved")]
+
+
+def synthetic_item(rng):
+    """Return one item's fields plus its type index and colour name."""
+    kind = int(rng.integers(len(ITEM_TYPES)))
+    colour = list(COLOURS)[int(rng.integers(len(COLOURS)))]
+    brand = BRANDS[int(rng.integers(len(BRANDS)))]
+    category, status = STATES[int(rng.integers(len(STATES)))]
+    location = LOCATIONS[int(rng.integers(len(LOCATIONS)))]
+    item_type = ITEM_TYPES[kind]
+
+    details = [f"{colour.capitalize()} {brand} {item_type}"]
+    details.append(f"{'Lost' if category == 'Lost' else 'Found'} near the {location.lower()}")
+    if item_type == "student ID card":
+        details.append(f"Name on card: {NAMES[int(rng.integers(len(NAMES)))]}")
+    elif rng.random() < 0.3:
+        details.append(f"Serial number SN-{int(rng.integers(10**5, 10**6))}")
+    if rng.random() < 0.5:
+        details.append("Has a sticker on the side" if rng.random() < 0.5 else "Slightly scratched")
+
+    item = {
+        "title": f"{colour.capitalize()} {item_type}",
+        "description": ". ".join(details),
+        "category": category,
+        "location": location,
+        "phone": f"555-{int(rng.integers(1000, 10000))}",
+        "status": status,
+        "created_at": f"2026-{int(rng.integers(1, 10)):02d}-{int(rng.integers(1, 29)):02d} 12:00:00",
+    }
+    return item, kind, colour
+
+
+def synthetic_photo(rng, colour, size=(640, 480)):
+    """Return JPEG bytes of a simple photo-like image dominated by `colour`."""
+    background = tuple(int(v) for v in rng.integers(150, 255, 3))
+    image = Image.new("RGB", size, background)
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    x, y = int(rng.integers(0, w // 3)), int(rng.integers(0, h // 3))
+    draw.rounded_rectangle([x, y, x + w // 2, y + h // 2], radius=30, fill=COLOURS[colour])
+    for _ in range(6):
+        cx, cy = int(rng.integers(0, w)), int(rng.integers(0, h))
+        draw.ellipse([cx, cy, cx + 40, cy + 40], fill=tuple(int(v) for v in rng.integers(0, 255, 3)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _synthetic_embeddings(kinds, dim, rng):
+    centres = np.random.default_rng(12345).standard_normal((len(ITEM_TYPES), dim)).astype(np.float32)
+    vectors = centres[kinds] + 0.8 * rng.standard_normal((len(kinds), dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _model_embeddings(rows, photos):
+    from app.utils.embeddings import build_text, combine_embeddings, encode_batch
+
+    texts = encode_batch("text", [build_text(r["description"], r["title"]) for r in rows])
+    positions = [i for i, photo in enumerate(photos) if photo]
+    images = dict(zip(positions, encode_batch("image", [io.BytesIO(photos[i]) for i in positions])))
+    vectors = []
+    for i, text in enumerate(texts):
+        parts = [text] + ([images[i]] if i in images and not isinstance(images[i], Exception) else [])
+        vectors.append(combine_embeddings(parts).cpu().numpy())
+    return np.stack(vectors)
+
+
+def generate_catalog(items, seed=0, image_ratio=0.5, embeddings="synthetic", dim=768, batch_size=500, progress=None):
+    """Fill DB_PATH and UPLOAD_DIR (relative to the cwd) with a synthetic catalog.
+
+    Returns a summary dict. Images are stored content-addressed and
+    registered like uploads; renditions are not generated.
+    """
+    from app.database import connect, init_db
+    from app.utils.embedding_codec import pack_embedding
+    from app.utils.image_utils import store_image_bytes
+    from app.utils.model_versions import load_active_model
+
+    rng = np.random.default_rng(seed)
+    init_db()
+    conn = connect()
+    model_name = load_active_model(conn)
+    start = time.perf_counter()
+    image_count = 0
+    try:
+        for offset in range(0, items, batch_size):
+            count = min(batch_size, items - offset)
+            generated = [synthetic_item(rng) for _ in range(count)]
+            rows = [g[0] for g in generated]
+            photos = [synthetic_photo(rng, g[2]) if rng.random() < image_ratio else None for g in generated]
+            if embeddings == "model":
+                vectors = _model_embeddings(rows, photos)
+            else:
+                vectors = _synthetic_embeddings(np.array([g[1] for g in generated]), dim, rng)
+
+            for row, photo, vector in zip(rows, photos, vectors):
+                image_path = store_image_bytes("photo.jpg", photo, conn) if photo else None
+                image_count += photo is not None
+                blob, vdim, dtype = pack_embedding(vector)
+                conn.execute(
+                    "INSERT INTO items (title, description, category, location, phone, image_path, embedding, embedding_dim, embedding_dtype, embedding_model, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row["title"], row["description"], row["category"], row["location"], row["phone"],
+                     image_path, blob, vdim, dtype, model_name, row["status"], row["created_at"]),
+                )
+            conn.commit()
+            if progress:
+                progress(offset + count)
+    finally:
+        conn.close()
+
+    return {
+        "items": items,
+        "images": image_count,
+        "seed": seed,
+        "embeddings": embeddings,
+        "dim": int(vectors.shape[1]) if items else dim,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="directory for database.db and uploads/")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-ratio", type=float, default=0.5, help="share of items with a photo")
+    parser.add_argument("--embeddings", choices=["synthetic", "model"], default="synthetic")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    # DB_PATH and UPLOAD_DIR are relative to the working directory
+    os.chdir(out)
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    print(f"🏭 Generating {args.items} items into {out.resolve()}...")
+    summary = generate_catalog(
+        args.items, args.seed, args.image_ratio, args.embeddings,
+        progress=lambda done: print(f"  {done}/{args.items}", end="\r"),
+    )
+    print(f"\n✅ {summary['items']} items, {summary['images']} images in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n❌ Dataset generation failed: {str(e)}")
+        sys.exit(1)
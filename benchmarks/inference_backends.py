@@ -0,0 +1,97 @@
+"""
+Latency and throughput benchmark for the CLIP inference backends.
+
+Runs the same texts and images through the torch backend and the ONNX
+Runtime export (fp32 and int8) and reports, per backend and modality, the
+single-item latency (p50/p95 over --runs encodes, as for one search
+query) and batched throughput (items/s at --batch-size, as for bulk
+import and re-embedding). Backends that are not installed or not
+exported are skipped.
+
+Usage:
+    python benchmarks/inference_backends.py [--model clip-ViT-L-14] [--runs 30] [--batch-size 32]
+    python benchmarks/inference_backends.py --backends torch onnx-int8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import MODEL_NAME
+from app.utils.embeddings import load_model
+
+BACKENDS = {
+    "torch": ("torch", False),
+    "onnx-fp32": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+
+def sample_inputs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = [f"lost item {i}: black backpack with a laptop and keys near the library" for i in range(count)]
+    images = [
+        Image.fromarray(rng.integers(0, 255, (224, 224, 3), dtype=np.uint8)) for _ in range(count)
+    ]
+    return {"text": texts, "image": images}
+
+
+def latency(model, payload, runs):
+    """Return p50 and p95 single-item latency in ms."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.encode(payload, convert_to_tensor=True, normalize_embeddings=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def throughput(model, payloads, batch_size):
+    """Return items per second encoding `payloads` in batches."""
+    start = time.perf_counter()
+    model.encode(payloads, batch_size=batch_size, convert_to_tensor=True, normalize_embeddings=True)
+    return len(payloads) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=30, help="single-item encodes per modality")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batches", type=int, default=4, help="batches in the throughput run")
+    args = parser.parse_args()
+
+    inputs = sample_inputs(args.batch_size * args.batches)
+    print(f"{args.model}: {args.runs} single encodes, {args.batches} batches of {args.batch_size}\n")
+    print(f"{'backend':<12}{'kind':<7}{'p50 ms':>9}{'p95 ms':>9}{'items/s':>10}{'load s':>9}")
+
+    for name in args.backends:
+        backend, quantized = BACKENDS[name]
+        start = time.perf_counter()
+        try:
+            model = load_model(args.model, backend, quantized=quantized)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"{name:<12}skipped: {e}")
+            continue
+        load_s = time.perf_counter() - start
+        if backend == "onnx" and model.variant != ("int8" if quantized else "fp32"):
+            print(f"{name:<12}skipped: export has no {name} variant")
+            continue
+
+        for kind, payloads in inputs.items():
+            model.encode(payloads[: args.batch_size], batch_size=args.batch_size)  # warm-up
+            p50, p95 = latency(model, payloads[0], args.runs)
+            rate = throughput(model, payloads, args.batch_size)
+            print(f"{name:<12}{kind:<7}{p50:>9.1f}{p95:>9.1f}{rate:>10.1f}{load_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark suite: synthetic catalog, micro-benchmarks and an in-process
+load test, written as JSON for comparison across commits.
+
+1. Generates a seeded synthetic catalog (see dataset.py) in a scratch
+   directory, which becomes the working directory, so DB_PATH and
+   UPLOAD_DIR point there and the real database is never touched.
+2. Micro-benchmarks get_embedding (text and image), the search scoring
+   loop (configured VECTOR_INDEX) and keyword search, each with and without
+   a filter, save_image (new and duplicate photo) and the listing queries.
+3. Load-tests GET /items, POST /search and POST /add-item through the
+   ASGI app in-process with --concurrency clients, reporting p50/p95/p99
+   latency and requests per second.
+
+Steps that need CLIP (get_embedding, vector and hybrid search, add-item)
+are skipped and listed under "skipped" when the model cannot be loaded;
+/search then runs in keyword mode. Results include the git commit and
+the relevant settings; compare two runs with compare.py.
+
+Usage:
+    python benchmarks/suite.py [--items 5000] [--requests 300] [--concurrency 8] [--out results.json]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def stats(timings_ms):
+    """Summarize a list of latencies in milliseconds."""
+    values = np.asarray(timings_ms)
+    return {
+        "runs": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def time_calls(fn, runs, warmup=3):
+    """Call `fn(i)` `runs` times after a warm-up and return its latency stats."""
+    for i in range(warmup):
+        fn(i)
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return stats(timings)
+
+
+def load_model():
+    """Load CLIP for the benchmarks, or return the reason it is unavailable."""
+    try:
+        from app.utils.embeddings import get_model
+        from app.utils.model_versions import get_active_model
+
+        get_model(get_active_model())
+        return None
+    except Exception as e:
+        return f"model unavailable: {e}"
+
+
+def micro_benchmarks(runs, dim, model_error, skipped):
+    from fastapi import UploadFile
+    from app.database import connection
+    from app.utils.hybrid_search import keyword_search
+    from app.utils.image_utils import save_image
+    from app.utils.item_listing import fetch_item_page
+    from app.utils.model_versions import get_active_model
+    from app.utils.ann_index import make_ann_index
+    from app.utils.vector_index import EmbeddingIndex
+    from dataset import synthetic_photo
+
+    results = {}
+    rng = np.random.default_rng(7)
+    photo = synthetic_photo(rng, "blue")
+
+    if model_error:
+        skipped["get_embedding"] = model_error
+    else:
+        from app.utils.embeddings import get_embedding
+
+        results["get_embedding.text"] = time_calls(
+            lambda i: get_embedding(text=f"black backpack {i}", title="Backpack"), runs
+        )
+        results["get_embedding.image"] = time_calls(
+            lambda i: get_embedding(image_data=io.BytesIO(photo)), runs
+        )
+
+    with connection() as conn:
+        # The search route's index, with the configured VECTOR_INDEX backend
+        index = EmbeddingIndex(ann=make_ann_index())
+        index.load(conn, get_active_model())
+        ids = [r[0] for r in conn.execute("SELECT id FROM items ORDER BY id")]
+        allowed = [r[0] for r in conn.execute("SELECT id FROM items WHERE category = 'Found' AND status = 'Found'")]
+
+        queries = rng.standard_normal((64, dim)).astype(np.float32)
+        results["search.score"] = time_calls(lambda i: index.search(queries[i % 64], k=10), runs)
+        results["search.score_filtered"] = time_calls(
+            lambda i: index.search(queries[i % 64], k=10, allowed_ids=allowed), runs
+        )
+        results["search.keyword"] = time_calls(
+            lambda i: keyword_search(conn, ["black backpack", "SN-12345", "student ID card Maria"][i % 3]), runs
+        )
+        # The default /search filter: open items only
+        results["search.keyword_filtered"] = time_calls(
+            lambda i: keyword_search(
+                conn, ["black backpack", "SN-12345", "student ID card Maria"][i % 3], "status IS NOT 'Resolved'"
+            ),
+            runs,
+        )
+
+        middle = ids[len(ids) // 2] if ids else None
+        results["listing.first_page"] = time_calls(lambda i: fetch_item_page(conn, limit=24, slim=True), runs)
+        results["listing.first_page_full"] = time_calls(lambda i: fetch_item_page(conn, limit=24), runs)
+        results["listing.deep_page"] = time_calls(lambda i: fetch_item_page(conn, middle, limit=24, slim=True), runs)
+        results["listing.stats"] = time_calls(
+            lambda i: conn.execute("SELECT SUM(count) FROM item_counts").fetchone(), runs
+        )
+
+    def upload(i, data):
+        return UploadFile(io.BytesIO(data), filename=f"bench-{i}.jpg")
+
+    unique = [synthetic_photo(np.random.default_rng(1000 + i), "red") for i in range(runs + 3)]
+    results["save_image.new"] = time_calls(lambda i: save_image(upload(i, unique[i])), runs)
+    results["save_image.duplicate"] = time_calls(lambda i: save_image(upload(i, photo)), runs)
+    return results
+
+
+async def load_test(requests, concurrency, model_error, skipped):
+    import httpx
+    from app.main import app
+    from dataset import synthetic_item, synthetic_photo
+
+    rng = np.random.default_rng(11)
+    queries = ["black backpack", "blue water bottle library", "student ID card", "SN-48213", "grey hoodie gym"]
+    search_mode = "hybrid" if not model_error else "keyword"
+
+    def items_request(i):
+        params = {"slim": "true", "limit": 24}
+        if i % 2:
+            params["after_id"] = int(rng.integers(1, 10**6))
+        return {"method": "GET", "url": "/items", "params": params}
+
+    def search_request(i):
+        return {"method": "POST", "url": "/search", "data": {"description": queries[i % len(queries)], "mode": search_mode}}
+
+    def add_request(i):
+        item, _, colour = synthetic_item(rng)
+        fields = {k: item[k] for k in ("title", "description", "category", "location", "phone")}
+        return {
+            "method": "POST", "url": "/add-item", "data": fields,
+            "files": {"image": (f"load-{i}.jpg", synthetic_photo(rng, colour), "image/jpeg")},
+        }
+
+    scenarios = {"GET /items": items_request, f"POST /search ({search_mode})": search_request}
+    if model_error:
+        skipped["POST /add-item"] = model_error
+    else:
+        scenarios["POST /add-item"] = add_request
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, make_request in scenarios.items():
+                timings, errors = [], 0
+                counter = iter(range(requests))
+
+                async def worker():
+                    nonlocal errors
+                    for i in counter:
+                        start = time.perf_counter()
+                        response = await client.request(**make_request(i))
+                        timings.append((time.perf_counter() - start) * 1000)
+                        errors += response.status_code >= 400
+
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                elapsed = time.perf_counter() - start
+                results[name] = {
+                    **stats(timings),
+                    "concurrency": concurrency,
+                    "errors": errors,
+                    "rps": round(len(timings) / elapsed, 1),
+                }
+                print(f"  {name:<28} p50 {results[name]['p50_ms']:>8.1f} ms  p99 {results[name]['p99_ms']:>8.1f} ms  {results[name]['rps']:>8.1f} req/s  {errors} errors")
+    return results
+
+
+def metadata():
+    from app import config
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    settings = (
+        "MODEL_NAME", "INFERENCE_BACKEND", "VECTOR_INDEX", "SEARCH_MODE", "EMBED_BATCHING",
+        "EMBEDDING_DTYPE", "DB_THREADS", "SQLITE_JOURNAL_MODE", "ASYNC_INGEST",
+    )
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {name: getattr(config, name) for name in settings},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=50, help="calls per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=300, help="requests per load-test endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workdir", help="scratch directory (default: a new temporary directory)")
+    parser.add_argument("--out", help="JSON results file (default benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--skip-load", action="store_true")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="lf-bench-")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    out = Path(args.out).resolve() if args.out else None
+    # DB_PATH, UPLOAD_DIR and the caches are relative to the working directory
+    os.chdir(workdir)
+    os.environ.setdefault("WARM_UP_ON_STARTUP", "0")
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    from dataset import generate_catalog
+
+    print(f"🏭 Generating {args.items} items in {workdir}...")
+    catalog = generate_catalog(args.items, args.seed)
+    model_error = load_model()
+    skipped = {}
+
+    print("⏱️  Micro-benchmarks...")
+    micro = micro_benchmarks(args.runs, catalog["dim"], model_error, skipped)
+    for name, result in micro.items():
+        print(f"  {name:<28} p50 {result['p50_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f} ms")
+
+    load = {}
+    if not args.skip_load:
+        print(f"🚦 Load test ({args.requests} requests per endpoint, {args.concurrency} clients)...")
+        load = asyncio.run(load_test(args.requests, args.concurrency, model_error, skipped))
+
+    results = {"meta": metadata(), "dataset": catalog, "micro": micro, "load": load, "skipped": skipped}
+    if out is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = PROJECT_ROOT / "benchmarks" / "results" / f"{stamp}-{results['meta']['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    for name, reason in skipped.items():
+        print(f"⚠️  Skipped {name}: {reason}")
+    print(f"✅ Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
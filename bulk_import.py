@@ -0,0 +1,78 @@
+"""
+Bulk import of lost & found items from a CSV or JSONL manifest.
+
+Manifest columns: title, description, category, location, phone and the
+optional status and image (a filename relative to --images-dir). The
+manifest is streamed, texts and images are encoded in large batches and
+rows are inserted one transaction per batch. A running server picks up
+items imported this way when it next loads its search index (restart).
+
+Usage:
+    python bulk_import.py items.csv --images-dir photos/ [--batch-size 64]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import BULK_BATCH_SIZE
+from app.database import connect, init_db
+from app.utils.bulk_import import import_items, iter_manifest, manifest_format
+from app.utils.inference import shutdown_executor
+from app.utils.model_versions import load_active_model
+from app.utils.vector_index import embedding_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="path to a .csv or .jsonl manifest")
+    parser.add_argument("--images-dir", default=".", help="directory holding the manifest's images")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    images_dir = Path(args.images_dir)
+
+    def load_image(name):
+        return (images_dir / name).read_bytes()
+
+    def progress(report):
+        print(f"  ✅ {report['imported']} imported, {len(report['errors'])} skipped")
+
+    init_db()
+    # Embed with the model the server searches with, and match new items
+    # against the ones already stored
+    conn = connect()
+    try:
+        embedding_index.load(conn, load_active_model(conn))
+    finally:
+        conn.close()
+
+    print(f"📂 Importing {args.manifest}...")
+    with open(args.manifest, "rb") as stream:
+        rows = iter_manifest(stream, manifest_format(args.manifest))
+        report = asyncio.run(import_items(rows, load_image, args.batch_size, progress))
+    shutdown_executor()
+
+    for error in report["errors"]:
+        print(f"  ❌ Line {error['line']}: {error['error']}")
+    for warning in report["warnings"]:
+        print(f"  ⚠️  Line {warning['line']}: {warning['error']} (imported without image)")
+
+    print("\n" + "=" * 50)
+    print("✅ Import complete!")
+    print(f"   Imported: {report['imported']}")
+    print(f"   Skipped: {report['failed']}")
+    print(f"   Throughput: {report['items_per_second']} items/s ({report['seconds']}s)")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n❌ Import failed: {str(e)}")
+        sys.exit(1)
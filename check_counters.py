@@ -0,0 +1,54 @@
+"""
+Consistency check for the item and user counters behind /item-stats.
+
+The `item_counts` and `user_counts` tables are kept up to date by triggers
+on `items` and `users`. This script recounts both tables and reports any
+group whose stored counter disagrees; --rebuild recomputes the counters
+from scratch in one transaction (safe next to a live server).
+
+Usage:
+    python check_counters.py [--rebuild]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import connect, counter_drift, init_db, rebuild_counters
+
+
+def check_counters(rebuild: bool):
+    init_db()
+    conn = connect()
+    try:
+        drift = counter_drift(conn)
+        if not drift:
+            print("✅ Counters match the items and users tables.")
+        for table, group, stored, actual in drift:
+            print(f"  ⚠️  {table} {' / '.join(group) or '(none)'}: stored {stored}, actual {actual}")
+
+        if rebuild:
+            print("🔄 Rebuilding counters...")
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild_counters(conn)
+            conn.commit()
+            drift = counter_drift(conn)
+            print("✅ Counters rebuilt." if not drift else f"❌ {len(drift)} groups still disagree")
+    finally:
+        conn.close()
+    return not drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="recompute the counters from the tables")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(0 if check_counters(args.rebuild) else 1)
+    except Exception as e:
+        print(f"\n❌ Counter check failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,124 @@
+"""
+Parity check between the torch and ONNX Runtime inference backends.
+
+Encodes the same texts and images with sentence-transformers and with the
+ONNX export (int8 by default, --fp32 for the unquantized towers) and
+compares them: the cosine similarity of every pair of embeddings, and
+how often both backends pick the same best image for each text. Fails
+when the largest cosine drift (1 - cosine) exceeds --max-drift, because
+stored item vectors come from the torch backend and search compares them
+with query vectors from the backend in use.
+
+Samples are item titles/descriptions and uploads from the database when
+available, topped up with built-in texts and generated images.
+
+Usage:
+    python check_onnx_parity.py [--model clip-ViT-L-14] [--samples 64] [--max-drift 0.02] [--fp32]
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import DB_PATH, MODEL_NAME, UPLOAD_DIR
+from app.utils.embeddings import build_text, load_model
+from app.utils.image_utils import open_downscaled
+
+SAMPLE_TEXTS = [
+    "Black backpack with a laptop inside",
+    "Student ID card",
+    "Silver keys on a red lanyard",
+    "Blue water bottle with stickers",
+    "iPhone in a clear case",
+    "Brown leather wallet",
+    "Wireless earbuds in a white case",
+    "Grey hoodie, size M",
+]
+
+
+def synthetic_image(seed):
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (320, 240), tuple(int(v) for v in rng.integers(0, 255, 3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = (int(v) for v in rng.integers(0, 260, 2))
+        draw.rectangle([x, y, x + 60, y + 40], fill=tuple(int(v) for v in rng.integers(0, 255, 3)))
+    return image
+
+
+def load_samples(count):
+    texts, images = [], []
+    if Path(DB_PATH).exists():
+        conn = sqlite3.connect(DB_PATH)
+        rows = conn.execute(
+            "SELECT title, description, image_path FROM items ORDER BY id DESC LIMIT ?", (count,)
+        ).fetchall()
+        conn.close()
+        for title, description, image_path in rows:
+            texts.append(build_text(description, title))
+            path = Path(UPLOAD_DIR) / Path(image_path or "").name
+            if image_path and path.is_file():
+                try:
+                    images.append(open_downscaled(path))
+                except OSError:
+                    pass
+    texts += SAMPLE_TEXTS[: max(0, count - len(texts))]
+    images += [synthetic_image(i) for i in range(max(0, min(count, len(SAMPLE_TEXTS)) - len(images)))]
+    return texts[:count], images[:count]
+
+
+def encode(model, payloads):
+    return np.asarray(model.encode(payloads, convert_to_tensor=False, normalize_embeddings=True), dtype=np.float32)
+
+
+def check_parity(model_name, samples, max_drift, quantized):
+    texts, images = load_samples(samples)
+    print(f"🔍 Comparing backends for {model_name} on {len(texts)} texts and {len(images)} images")
+
+    reference = load_model(model_name, "torch")
+    candidate = load_model(model_name, "onnx", quantized=quantized)
+    print(f"   ONNX variant: {candidate.variant}")
+
+    worst = 0.0
+    embeddings = {}
+    for kind, payloads in (("text", texts), ("image", images)):
+        if not payloads:
+            continue
+        a, b = encode(reference, payloads), encode(candidate, payloads)
+        cosine = np.sum(a * b, axis=1)
+        embeddings[kind] = (a, b)
+        worst = max(worst, float(1 - cosine.min()))
+        print(f"  {kind:<6} cosine min {cosine.min():.4f}  mean {cosine.mean():.4f}")
+
+    if "text" in embeddings and "image" in embeddings:
+        (ta, tb), (ia, ib) = embeddings["text"], embeddings["image"]
+        agreement = np.mean(np.argmax(ta @ ia.T, axis=1) == np.argmax(tb @ ib.T, axis=1))
+        print(f"  text→image top-1 agreement {agreement:.1%}")
+
+    if worst > max_drift:
+        print(f"❌ Max cosine drift {worst:.4f} exceeds {max_drift}")
+        return False
+    print(f"✅ Max cosine drift {worst:.4f} is within {max_drift}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--samples", type=int, default=64, help="texts and images to compare")
+    parser.add_argument("--max-drift", type=float, default=0.02, help="largest allowed 1 - cosine")
+    parser.add_argument("--fp32", action="store_true", help="check the unquantized export")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(0 if check_parity(args.model, args.samples, args.max_drift, not args.fp32) else 1)
+    except Exception as e:
+        print(f"\n❌ Parity check failed: {str(e)}")
+        sys.exit(1)
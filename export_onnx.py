@@ -0,0 +1,50 @@
+"""
+Export a CLIP model's text and vision towers to ONNX for the ONNX Runtime
+inference backend (INFERENCE_BACKEND=onnx).
+
+Writes fp32 towers plus dynamically quantized int8 copies (unless
+--no-quantize) to ONNX_MODEL_DIR/<model>. Run check_onnx_parity.py
+afterwards to confirm the export stays close to the torch backend before
+switching the server over.
+
+Requires torch, sentence-transformers, onnx and onnxruntime.
+
+Usage:
+    python export_onnx.py [--model clip-ViT-L-14] [--out DIR] [--no-quantize] [--opset 17]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import MODEL_NAME
+from app.utils.onnx_backend import export_onnx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME, help="sentence-transformers CLIP model to export")
+    parser.add_argument("--out", help="output directory (default ONNX_MODEL_DIR/<model>)")
+    parser.add_argument("--no-quantize", action="store_true", help="only write the fp32 towers")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    print(f"📦 Exporting {args.model} to ONNX (opset {args.opset})...")
+    start = time.perf_counter()
+    out = export_onnx(args.model, args.out, quantize=not args.no_quantize, opset=args.opset)
+    for path in sorted(out.glob("*.onnx")):
+        print(f"  {path.name:<20} {path.stat().st_size / 1e6:>8.1f} MB")
+    print(f"✅ Export written to {out} in {time.perf_counter() - start:.0f}s")
+    print(f"   Next: python check_onnx_parity.py --model {args.model}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n❌ Export failed: {str(e)}")
+        sys.exit(1)
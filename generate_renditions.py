@@ -0,0 +1,66 @@
+"""
+Backfill thumbnail and medium renditions for uploads stored before the
+image pipeline existed.
+
+New uploads get their renditions when they are saved; this script walks
+the items table and writes the missing ones (--force rewrites all, e.g.
+after changing THUMBNAIL_SIZE or MEDIUM_SIZE). List views fall back to the
+original image until a rendition exists, so it is safe to run against a
+live server.
+
+Usage:
+    python generate_renditions.py [--force]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import UPLOAD_DIR
+from app.database import connect
+from app.utils.image_utils import RENDITIONS, make_renditions, rendition_path
+
+
+def generate_renditions(force: bool):
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, image_path FROM items WHERE image_path IS NOT NULL AND image_path != ''"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    print(f"🖼️  Checking {len(rows)} item images...")
+    created = skipped = failed = 0
+    for item_id, image_path in rows:
+        filename = Path(image_path).name
+        if not (Path(UPLOAD_DIR) / filename).exists():
+            print(f"  ⚠️  Item {item_id}: {filename} is missing")
+            failed += 1
+            continue
+        if not force and all(rendition_path(filename, kind).exists() for kind in RENDITIONS):
+            skipped += 1
+            continue
+        if make_renditions(filename):
+            created += 1
+        else:
+            print(f"  ⚠️  Item {item_id}: {filename} could not be decoded")
+            failed += 1
+
+    print(f"✅ Renditions written for {created} images ({skipped} up to date, {failed} failed)")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rewrite renditions that already exist")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(0 if generate_renditions(args.force) else 1)
+    except Exception as e:
+        print(f"\n❌ Rendition backfill failed: {str(e)}")
+        sys.exit(1)
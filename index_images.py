@@ -0,0 +1,63 @@
+"""
+Register uploads stored before content-addressed storage in the image
+index, so they take part in duplicate detection.
+
+New uploads are hashed when they are saved; this script computes the
+SHA-256 and perceptual hash of every item image not yet in the `images`
+table. Files keep their existing names. Safe to rerun.
+
+Usage:
+    python index_images.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import UPLOAD_DIR
+from app.database import connect, init_db
+from app.utils.image_store import duplicate_groups, image_fingerprint, register_image
+
+
+def index_images():
+    init_db()
+    conn = connect()
+    try:
+        rows = conn.execute(
+            """
+            SELECT DISTINCT image_path FROM items
+            WHERE image_path IS NOT NULL AND image_path != ''
+              AND image_path NOT IN (SELECT image_path FROM images)
+            """
+        ).fetchall()
+        print(f"🔍 Hashing {len(rows)} unindexed images...")
+
+        indexed = missing = 0
+        for (image_path,) in rows:
+            path = Path(UPLOAD_DIR) / Path(image_path).name
+            if not path.exists():
+                print(f"  ⚠️  {image_path} is missing")
+                missing += 1
+                continue
+            sha256, phash = image_fingerprint(path.read_bytes())
+            register_image(conn, image_path, sha256, phash)
+            indexed += 1
+            if indexed % 100 == 0:
+                conn.commit()
+        conn.commit()
+
+        groups = duplicate_groups(conn)
+        print(f"✅ Indexed {indexed} images ({missing} missing)")
+        print(f"📋 {len(groups)} duplicate groups (see GET /duplicate-images)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        index_images()
+    except Exception as e:
+        print(f"\n❌ Image indexing failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,87 @@
+"""
+One-shot converter from JSON TEXT embeddings to binary BLOB embeddings.
+
+Older databases store each 768-dim CLIP vector as a JSON list in the
+`items.embedding` column. This script rewrites those rows as little-endian
+float32 (or float16) BLOBs and fills in `embedding_dim` / `embedding_dtype`.
+No model is loaded; existing vectors are converted as-is.
+
+Usage:
+    python migrate_embedding_blobs.py [--dtype float32|float16] [--batch-size 500]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import EMBEDDING_DTYPE
+from app.database import connect, init_db
+from app.utils.embedding_codec import DTYPES, pack_embedding
+
+
+def _fetch_batch(conn, after_id, batch_size):
+    return conn.execute(
+        "SELECT id, embedding FROM items WHERE id > ? AND typeof(embedding) = 'text' ORDER BY id LIMIT ?",
+        (after_id, batch_size),
+    ).fetchall()
+
+
+def convert_embeddings(dtype: str = EMBEDDING_DTYPE, batch_size: int = 500):
+    """Rewrite every JSON-encoded embedding as a binary BLOB, one batch of ids at a time."""
+    # Make sure the metadata columns exist on old databases
+    init_db()
+
+    conn = connect()
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM items WHERE typeof(embedding) = 'text'").fetchone()[0]
+        if not total:
+            print("✅ No JSON embeddings found. Nothing to convert.")
+            return
+
+        print(f"📊 Converting {total} embeddings to {dtype} BLOBs...")
+
+        converted = 0
+        errors = 0
+        batch = _fetch_batch(conn, 0, batch_size)
+        while batch:
+            updates = []
+            for item_id, text in batch:
+                try:
+                    blob, dim, stored_dtype = pack_embedding(json.loads(text), dtype)
+                    updates.append((blob, dim, stored_dtype, item_id))
+                except (ValueError, TypeError) as e:
+                    errors += 1
+                    print(f"  ❌ Item {item_id}: {str(e)}")
+            conn.executemany(
+                "UPDATE items SET embedding = ?, embedding_dim = ?, embedding_dtype = ? WHERE id = ?",
+                updates,
+            )
+            conn.commit()
+            converted += len(updates)
+            print(f"  ✅ {converted}/{total} converted")
+            batch = _fetch_batch(conn, batch[-1][0], batch_size)
+    finally:
+        conn.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Conversion complete!")
+    print(f"   Converted: {converted}")
+    print(f"   Failed: {errors}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default=EMBEDDING_DTYPE)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        convert_embeddings(args.dtype, args.batch_size)
+    except Exception as e:
+        print(f"\n❌ Conversion failed: {str(e)}")
+        sys.exit(1)
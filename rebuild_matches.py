@@ -0,0 +1,67 @@
+"""
+Recompute the precomputed lost/found match table from stored embeddings.
+
+Items added or updated through the app keep their matches current; run
+this once after upgrading (items stored before the table existed have
+none), after activating a new embedding model, or after changing
+MATCH_TOP_K or the similarity threshold. Every open lost and found item
+is scored against the open items on the other side with the in-memory
+index, so no model is loaded. Safe to rerun.
+
+Usage:
+    python rebuild_matches.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import ITEM_SIDE, connect, init_db
+from app.utils.embedding_codec import unpack_embedding
+from app.utils.matches import store_matches
+from app.utils.model_versions import load_active_model
+from app.utils.vector_index import embedding_index
+
+
+def rebuild_matches():
+    init_db()
+    conn = connect()
+    try:
+        model_name = load_active_model(conn)
+        embedding_index.load(conn, model_name)
+        rows = conn.execute(
+            f"""
+            SELECT id, embedding, embedding_dim, embedding_dtype FROM items
+            WHERE embedding IS NOT NULL AND embedding_model = ?
+              AND {ITEM_SIDE} IS NOT NULL AND status IS NOT 'Resolved'
+            """,
+            (model_name,),
+        ).fetchall()
+        print(f"🔗 Matching {len(rows)} open items with {model_name}...")
+
+        start = time.perf_counter()
+        conn.execute("DELETE FROM matches")
+        matched = 0
+        for i, (item_id, blob, dim, dtype) in enumerate(rows, start=1):
+            stored = store_matches(conn, item_id, unpack_embedding(blob, dim, dtype), model_name)
+            matched += stored > 0
+            if i % 500 == 0:
+                conn.commit()
+                print(f"  {i}/{len(rows)}", end="\r")
+        conn.commit()
+
+        total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        print(f"\n✅ {matched} items have candidates; {total} distinct pairs stored in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        rebuild_matches()
+    except Exception as e:
+        print(f"\n❌ Match rebuild failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,201 @@
+"""
+Re-embed items with a CLIP model.
+
+Replaces the old per-item migrate_embeddings.py / migrate_to_new_embeddings.py
+scripts. Items are processed in id order, BATCH at a time:
+
+- images for the next batch are decoded by parallel workers while the
+  current batch is encoded, and each batch costs one text and one image
+  model call; decoded model-sized crops are cached on disk so later runs
+  skip decoding the originals;
+- each batch is written in its own short transaction together with a
+  checkpoint row in `reembed_progress`, so the write lock is held only for
+  the UPDATEs and an interrupted run resumes where it stopped;
+- it can run next to a live server.
+
+With --model set to something other than the active model, vectors are
+written to the `item_embeddings` staging table and search keeps using the
+current model. Once coverage is complete, switch over with
+POST /embedding-models/activate; items added or edited during the build can
+be filled in with --missing-only first. Without --model the active model's
+vectors are rewritten in place; a running server keeps searching its old
+in-memory vectors until POST /embedding-models/reload (or a restart).
+
+Usage:
+    python reembed.py [--model NAME] [--missing-only] [--batch-size 64]
+                      [--decode-workers 4] [--restart]
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config import MODEL_NAME, UPLOAD_DIR
+from app.database import connect, init_db, get_setting
+from app.utils.embedding_codec import pack_embedding
+from app.utils.embeddings import build_text, combine_embeddings, encode_batch
+from app.utils.image_utils import load_preprocessed
+
+
+def _load_image(image_path):
+    """Load an item's image as a model-sized crop, returning None or the error on failure.
+
+    Crops are cached in PREPROCESS_CACHE_DIR, so repeated runs (e.g. one
+    per candidate model) skip decoding the originals.
+    """
+    if not image_path:
+        return None
+    path = Path(UPLOAD_DIR) / image_path
+    if not path.exists():
+        # Very old rows stored a path relative to the project root
+        path = Path(image_path)
+    try:
+        return load_preprocessed(path)
+    except Exception as e:
+        return e
+
+
+def _item_filter(model_name, staged, missing_only):
+    """SQL condition (and params) selecting the items a run should process."""
+    if not missing_only:
+        return "", ()
+    if staged:
+        return " AND id NOT IN (SELECT item_id FROM item_embeddings WHERE model_name = ?)", (model_name,)
+    return " AND (embedding IS NULL OR embedding_model IS NOT ?)", (model_name,)
+
+
+def _fetch_batch(conn, after_id, batch_size, item_filter):
+    condition, params = item_filter
+    return conn.execute(
+        f"SELECT id, title, description, image_path FROM items WHERE id > ?{condition} ORDER BY id LIMIT ?",
+        (after_id, *params, batch_size),
+    ).fetchall()
+
+
+def reembed(batch_size: int, decode_workers: int, restart: bool, model_name=None, missing_only=False):
+    init_db()
+    conn = connect()
+
+    active_model = get_setting(conn, "active_model", MODEL_NAME)
+    model_name = model_name or active_model
+    staged = model_name != active_model
+    item_filter = _item_filter(model_name, staged, missing_only)
+    target = "staging table" if staged else "items (active model)"
+
+    progress = conn.execute(
+        "SELECT last_item_id, processed, failed FROM reembed_progress WHERE model_name = ? AND finished_at IS NULL",
+        (model_name,),
+    ).fetchone()
+    if progress and not restart:
+        last_id, processed, failed = progress
+        print(f"⏩ Resuming {model_name} run after item {last_id} ({processed} done) into {target}")
+    else:
+        last_id, processed, failed = 0, 0, 0
+        conn.execute(
+            "INSERT OR REPLACE INTO reembed_progress (model_name, last_item_id, processed, failed) VALUES (?, 0, 0, 0)",
+            (model_name,),
+        )
+        conn.commit()
+        print(f"🔄 Re-embedding {'missing' if missing_only else 'all'} items with {model_name} into {target}")
+
+    condition, params = item_filter
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM items WHERE id > ?{condition}", (last_id, *params)
+    ).fetchone()[0]
+    start = time.perf_counter()
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=decode_workers) as pool:
+        batch = _fetch_batch(conn, last_id, batch_size, item_filter)
+        pending_images = [pool.submit(_load_image, r[3]) for r in batch]
+
+        while batch:
+            # Prefetch and decode the next batch while this one is encoded
+            next_batch = _fetch_batch(conn, batch[-1][0], batch_size, item_filter)
+            next_images = [pool.submit(_load_image, r[3]) for r in next_batch]
+
+            images = [f.result() for f in pending_images]
+            texts = [build_text(r[2], r[1]) for r in batch]
+            text_embeddings = encode_batch("text", texts, model_name)
+
+            positions = [i for i, img in enumerate(images) if img is not None and not isinstance(img, Exception)]
+            image_embeddings = dict(zip(positions, encode_batch("image", [images[i] for i in positions], model_name))) if positions else {}
+
+            updates = []
+            for i, (item_id, title, _, image_path) in enumerate(batch):
+                if isinstance(images[i], Exception):
+                    failed += 1
+                    print(f"  ⚠️  Item {item_id}: image {image_path} unreadable, using text only ({images[i]})")
+                parts = [text_embeddings[i]]
+                if isinstance(image_embeddings.get(i), Exception):
+                    failed += 1
+                    print(f"  ⚠️  Item {item_id}: {image_embeddings[i]}, using text only")
+                elif i in image_embeddings:
+                    parts.append(image_embeddings[i])
+                blob, dim, dtype = pack_embedding(combine_embeddings(parts))
+                updates.append((item_id, blob, dim, dtype))
+
+            last_id = batch[-1][0]
+            processed += len(batch)
+            done += len(batch)
+
+            # Short write transaction: vectors and checkpoint commit together
+            if staged:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO item_embeddings (item_id, embedding, embedding_dim, embedding_dtype, model_name) VALUES (?, ?, ?, ?, ?)",
+                    [(*u, model_name) for u in updates],
+                )
+            else:
+                conn.executemany(
+                    "UPDATE items SET embedding = ?, embedding_dim = ?, embedding_dtype = ?, embedding_model = ?, embedding_status = 'ready' WHERE id = ?",
+                    [(blob, dim, dtype, model_name, item_id) for item_id, blob, dim, dtype in updates],
+                )
+            conn.execute(
+                "UPDATE reembed_progress SET last_item_id = ?, processed = ?, failed = ?, updated_at = CURRENT_TIMESTAMP WHERE model_name = ?",
+                (last_id, processed, failed, model_name),
+            )
+            conn.commit()
+
+            rate = done / (time.perf_counter() - start)
+            print(f"  ✅ {done}/{total} items ({rate:.1f} items/s), last id {last_id}")
+
+            batch, pending_images = next_batch, next_images
+
+    conn.execute(
+        "UPDATE reembed_progress SET finished_at = CURRENT_TIMESTAMP WHERE model_name = ?",
+        (model_name,),
+    )
+    conn.commit()
+    conn.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Re-embedding complete!")
+    print(f"   Items processed: {processed}")
+    print(f"   Image problems (text-only): {failed}")
+    if not staged:
+        print("   Running server: POST /embedding-models/reload to search the new vectors")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="model to embed with (default: the active model)")
+    parser.add_argument("--missing-only", action="store_true", help="only items without a vector for this model")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint and start over")
+    args = parser.parse_args()
+
+    try:
+        reembed(args.batch_size, args.decode_workers, args.restart, args.model, args.missing_only)
+    except KeyboardInterrupt:
+        print("\n⏸  Interrupted; run again to resume from the last checkpoint.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Re-embedding failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,61 @@
+import asyncio
+import io
+import json
+
+from app.utils import bulk_import
+from app.utils.bulk_import import import_items, iter_manifest
+
+VALID = {
+    "title": "Blue backpack",
+    "description": "Blue backpack with a laptop sleeve",
+    "category": "Lost",
+    "location": "Library",
+    "phone": "555-0100",
+}
+
+
+def _jsonl(*lines):
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def _run_import(stream, monkeypatch):
+    imported = []
+
+    async def fake_batch(batch, load_image, report):
+        # Stands in for encoding and inserting; only the bookkeeping is under test
+        imported.extend(line for line, _, _, _ in batch)
+        report["imported"] += len(batch)
+
+    monkeypatch.setattr(bulk_import, "_import_batch", fake_batch)
+    report = asyncio.run(import_items(iter_manifest(stream, "jsonl"), lambda name: b"", batch_size=2))
+    return report, imported
+
+
+def test_non_object_json_lines_are_row_errors(monkeypatch):
+    stream = _jsonl(json.dumps(VALID), '["a"]', "3", json.dumps(VALID))
+
+    report, imported = _run_import(stream, monkeypatch)
+
+    assert imported == [1, 4]
+    assert report["imported"] == 2
+    assert report["failed"] == 2
+    assert [e["line"] for e in report["errors"]] == [2, 3]
+    assert "expected an object, got list" in report["errors"][0]["error"]
+    assert "expected an object, got int" in report["errors"][1]["error"]
+
+
+def test_malformed_json_line_does_not_stop_the_import(monkeypatch):
+    stream = _jsonl(json.dumps(VALID), json.dumps(VALID), '{"title": "broken', "", json.dumps(VALID))
+
+    report, imported = _run_import(stream, monkeypatch)
+
+    assert imported == [1, 2, 5]
+    assert report["imported"] == 3
+    assert [e["line"] for e in report["errors"]] == [3]
+    assert report["errors"][0]["error"].startswith("invalid JSON")
+
+
+def test_csv_rows_report_file_line_numbers():
+    stream = io.BytesIO(b"title,description,category,location,phone\na,b,Lost,c,d\ne,f,Found,g,h\n")
+
+    assert [line for line, _ in iter_manifest(stream, "csv")] == [2, 3]